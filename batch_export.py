@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Batch Export
+Exports many course databases shaped like hci_exam_review.db concurrently,
+one process per database, and reports per-database timings and failures.
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from export_to_json import export_database
+
+def expand_databases(patterns):
+    """Expand paths and glob patterns into a sorted, de-duplicated list of files"""
+    paths = []
+    for pattern in patterns:
+        matches = glob.glob(pattern) if glob.has_magic(pattern) else [pattern]
+        paths.extend(matches)
+    return sorted(set(paths))
+
+def output_dir_for(db_path, output_root):
+    """Return the directory a database exports into: <output_root>/<db name>"""
+    return os.path.join(output_root, os.path.splitext(os.path.basename(db_path))[0])
+
+def export_one(db_path, output_dir, options):
+    """Export one database in a worker process.
+
+    Returns (db_path, seconds, error) where error is None on success. The
+    exporter's progress output is captured so workers don't interleave.
+    """
+    start = time.perf_counter()
+    try:
+        if not os.path.exists(db_path):
+            raise FileNotFoundError(f"{db_path} not found")
+        os.makedirs(output_dir, exist_ok=True)
+        output_path = os.path.join(output_dir, 'hci_data.json')
+        shard_dir = os.path.join(output_dir, 'data') if options.get('shards') else None
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            export_database(db_path, output_path, stream=options.get('stream', False),
+                            search_index=options.get('search_index', False))
+            if shard_dir:
+                export_database(db_path, output_path, shard_dir=shard_dir)
+        return db_path, time.perf_counter() - start, None
+    except Exception as e:
+        return db_path, time.perf_counter() - start, f"{type(e).__name__}: {e}"
+
+def batch_export(db_paths, output_root, workers=None, options=None):
+    """Export every database on a process pool and return results in input order"""
+    options = options or {}
+    output_dirs = [output_dir_for(db_path, output_root) for db_path in db_paths]
+    if len(set(output_dirs)) != len(output_dirs):
+        raise ValueError("Databases with the same file name would export into the same directory")
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = [pool.submit(export_one, db_path, output_dir, options)
+                   for db_path, output_dir in zip(db_paths, output_dirs)]
+        for future in as_completed(futures):
+            db_path, elapsed, error = future.result()
+            results[db_path] = (elapsed, error)
+    return [(db_path, *results[db_path]) for db_path in db_paths]
+
+def main():
+    parser = argparse.ArgumentParser(description="Export many course databases in parallel")
+    parser.add_argument('databases', nargs='+', help="database files or glob patterns")
+    parser.add_argument('--output-dir', default='exports',
+                        help="root directory; each database exports into <output-dir>/<database name>/")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="number of worker processes (default: number of CPU cores)")
+    parser.add_argument('--stream', action='store_true', help="use the streaming exporter")
+    parser.add_argument('--shards', action='store_true', help="also write per-category shards into data/")
+    parser.add_argument('--search-index', action='store_true', help="also write the keyword index")
+    args = parser.parse_args()
+
+    db_paths = expand_databases(args.databases)
+    if not db_paths:
+        print("No databases matched")
+        sys.exit(1)
+
+    options = {'stream': args.stream, 'shards': args.shards, 'search_index': args.search_index}
+    start = time.perf_counter()
+    results = batch_export(db_paths, args.output_dir, args.workers, options)
+    wall_time = time.perf_counter() - start
+
+    print("="*50)
+    print("BATCH EXPORT")
+    print("="*50)
+    failures = 0
+    for db_path, elapsed, error in results:
+        status = "ok" if error is None else f"FAILED ({error})"
+        print(f"{elapsed:>8.2f}s  {db_path}  {status}")
+        failures += error is not None
+
+    slowest = max(elapsed for _, elapsed, _ in results)
+    print(f"\nExported {len(results) - failures} of {len(results)} databases")
+    print(f"Wall time: {wall_time:.2f}s (slowest database: {slowest:.2f}s)")
+
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
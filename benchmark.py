@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Scaling Benchmark Suite
+Generates synthetic courses of increasing size and records wall time and peak
+Python memory for ingest, export, search (full-text and LIKE scan), term detail
+lookup (uncached and cached) and random flashcards, so regressions show up
+before they reach the real course.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from export_to_json import export_database
+from study_tool import HCIStudyTool
+from synthetic_course import generate_course
+
+SIZES = [1000, 10000, 100000]
+
+# Number of calls timed for each per-query operation
+QUERY_REPEAT = 20
+
+def measure(fn, repeat=1):
+    """Return (seconds per call, peak MB) for fn.
+
+    Timing and memory are measured in separate runs because tracing
+    allocations slows the code under test.
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - start) / repeat
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / (1024 * 1024)
+
+def quiet(fn):
+    """Wrap fn so its progress output is discarded"""
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return fn()
+    return run
+
+def benchmark_size(num_terms, tmp_dir, seed=0):
+    """Run every operation against one synthetic course and return {operation: (seconds, MB)}"""
+    db_path = os.path.join(tmp_dir, f"synthetic_{num_terms}.db")
+    output_path = os.path.join(tmp_dir, f"synthetic_{num_terms}.json")
+    results = {}
+
+    start = time.perf_counter()
+    quiet(lambda: generate_course(db_path, num_terms, seed=seed))()
+    results['ingest'] = (time.perf_counter() - start, None)
+
+    results['export'] = measure(quiet(lambda: export_database(db_path, output_path)))
+    results['export_stream'] = measure(quiet(lambda: export_database(db_path, output_path, stream=True)))
+
+    # The result cache is off so repeated names still time the queries themselves
+    tool = HCIStudyTool(db_path, seed=seed, cache_size=0)
+    cached_tool = HCIStudyTool(db_path, seed=seed)
+    rng = random.Random(seed)
+    names = [name for _, name, _ in tool.get_random_terms(QUERY_REPEAT)]
+    words = [name.split()[1] for name in names]
+
+    # One common word matches a large share of the course; a full name only a few terms
+    results['search'] = measure(lambda: tool.find_terms(rng.choice(words)), QUERY_REPEAT)
+    results['search_like'] = measure(lambda: tool.find_terms_like(rng.choice(words)), QUERY_REPEAT)
+    results['search_name'] = measure(lambda: tool.find_terms(rng.choice(names)), QUERY_REPEAT)
+    results['search_name_like'] = measure(lambda: tool.find_terms_like(rng.choice(names)), QUERY_REPEAT)
+    results['term_detail'] = measure(lambda: tool.get_term_details(rng.choice(names)), QUERY_REPEAT)
+    results['term_detail_cached'] = measure(lambda: cached_tool.get_term_details(rng.choice(names)), QUERY_REPEAT)
+    results['random_flashcard'] = measure(lambda: tool.get_random_terms(1), QUERY_REPEAT)
+    tool.close()
+    cached_tool.close()
+
+    os.remove(db_path)
+    os.remove(output_path)
+    return results
+
+def find_regressions(results, baseline, tolerance):
+    """Return descriptions of timings slower than baseline by more than tolerance"""
+    regressions = []
+    for size, operations in results.items():
+        for operation, (seconds, _) in operations.items():
+            previous = baseline.get(size, {}).get(operation)
+            if previous and seconds > previous[0] * tolerance:
+                regressions.append(f"{operation} @ {size} terms: {previous[0]:.4f}s -> {seconds:.4f}s")
+    return regressions
+
+def print_results(results):
+    print("\n" + "="*70)
+    print("SCALING BENCHMARK")
+    print("="*70)
+    print(f"{'Terms':>9} {'Operation':<18} {'Seconds':>12} {'us/term':>10} {'Peak MB':>10}")
+    for size, operations in results.items():
+        for operation, (seconds, peak) in operations.items():
+            per_term = seconds / int(size) * 1e6
+            peak_text = f"{peak:>10.1f}" if peak is not None else f"{'-':>10}"
+            print(f"{size:>9} {operation:<18} {seconds:>12.5f} {per_term:>10.3f} {peak_text}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HCI tools on synthetic courses")
+    parser.add_argument('sizes', nargs='*', type=int, default=SIZES,
+                        help="course sizes in terms (default: 1000 10000 100000; 1000000 is supported)")
+    parser.add_argument('--output', help="write results as JSON to this file")
+    parser.add_argument('--baseline', help="compare against results previously written with --output")
+    parser.add_argument('--tolerance', type=float, default=1.5,
+                        help="fail when an operation is this many times slower than the baseline")
+    parser.add_argument('--seed', type=int, default=0, help="random seed for course content and queries")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for num_terms in args.sizes:
+            results[str(num_terms)] = benchmark_size(num_terms, tmp_dir, args.seed)
+
+    print_results(results)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.tolerance)
+        if regressions:
+            print("\nREGRESSIONS:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nNo regressions against baseline")
+
+if __name__ == "__main__":
+    main()
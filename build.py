@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Build Pipeline
+One command for the whole site build: schema + populate sections -> database
+-> JSON export, shards and search index. Each stage is keyed by a hash of
+its input files; stages whose inputs and outputs are unchanged since the last
+build are skipped, so a no-op rebuild only hashes files.
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import time
+
+from database import DB_PATH, connect_readonly
+from export_to_json import export_database
+from parallel_build import parallel_build
+
+CACHE_PATH = '.build_cache.json'
+
+# Each stage's inputs: its data plus every module it imports, directly or
+# through another listed module
+POPULATE_SOURCES = [
+    'create_database.sql', 'database.py', 'populate_common.py', 'populate_database.py',
+    'populate_analysis.py', 'populate_design.py', 'populate_remaining.py', 'parallel_build.py',
+]
+EXPORT_SOURCES = ['export_to_json.py', 'hierarchy.py', 'search_index.py', 'database.py', DB_PATH]
+
+def count_rows(db_path, *tables):
+    conn = connect_readonly(db_path)
+    try:
+        return {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in tables}
+    finally:
+        conn.close()
+
+def build_db():
+    parallel_build(DB_PATH)
+    return count_rows(DB_PATH, 'terms', 'answers')
+
+def build_export():
+    num_categories, num_terms = export_database(DB_PATH, 'hci_data.json', stream=True, search_index=True)
+    return {'categories': num_categories, 'terms': num_terms}
+
+def build_shards():
+    num_categories, num_terms = export_database(DB_PATH, shard_dir='data')
+    return {'categories': num_categories, 'terms': num_terms}
+
+# Stages in dependency order: (name, input files, output files, run). The
+# export stages read the database file itself, so they only rerun when the
+# rebuilt database actually differs.
+STAGES = [
+    ('database', POPULATE_SOURCES, [DB_PATH], build_db),
+    ('export', EXPORT_SOURCES, ['hci_data.json', 'hci_data.search.json'], build_export),
+    ('shards', EXPORT_SOURCES, ['data/manifest.json'], build_shards),
+]
+
+def hash_files(paths):
+    """Return one digest over the names and contents of paths"""
+    digest = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        digest.update(path.encode('utf-8') + b'\0')
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+def load_cache(cache_path=CACHE_PATH):
+    try:
+        with open(cache_path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_cache(cache, cache_path=CACHE_PATH):
+    with open(cache_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2)
+
+def run_build(stages=STAGES, force=False, cache_path=CACHE_PATH):
+    """Run every stage whose inputs changed; return (name, status, seconds, counts) per stage.
+
+    A stage's inputs are hashed only after the stages before it have run,
+    so an export sees the freshly built database. A stage whose inputs hash
+    the same as last time is rebuilt anyway if one of its outputs is missing.
+    """
+    cache = load_cache(cache_path)
+    results = []
+    for name, inputs, outputs, run in stages:
+        start = time.perf_counter()
+        key = hash_files(inputs) if all(os.path.exists(path) for path in inputs) else None
+        cached = cache.get(name, {})
+        if not force and key and cached.get('key') == key and all(os.path.exists(path) for path in outputs):
+            results.append((name, 'cached', time.perf_counter() - start, cached.get('counts', {})))
+            continue
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            counts = run()
+        cache[name] = {'key': hash_files(inputs), 'counts': counts}
+        save_cache(cache, cache_path)
+        results.append((name, 'built', time.perf_counter() - start, counts))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the database and website data, skipping unchanged stages")
+    parser.add_argument('--force', action='store_true', help="rebuild every stage")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = run_build(force=args.force)
+    wall_time = time.perf_counter() - start
+
+    print("="*50)
+    print("BUILD")
+    print("="*50)
+    for name, status, seconds, counts in results:
+        rows = ', '.join(f"{n} {table}" for table, n in counts.items())
+        print(f"{name:<10} {status:<7} {seconds:>7.3f}s  {rows}")
+    print(f"\nTotal: {wall_time:.3f}s")
+
+if __name__ == "__main__":
+    main()
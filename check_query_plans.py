@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Query Plan Check
+Runs EXPLAIN QUERY PLAN on every query the study tool, the exporter and
+query_examples.sql send to the database and fails if any of them reads a
+whole table that INTENDED_SCANS doesn't list, so a dropped index or a
+rewritten query can't quietly turn a lookup into a full scan.
+
+The plans are taken on an in-memory copy of the database after ANALYZE, as
+the published database has statistics and a freshly populated one may not,
+and the planner picks different plans for the two.
+"""
+
+import argparse
+import re
+import sqlite3
+import sys
+
+import export_to_json
+from database import DB_PATH, connect_readonly
+from study_tool import HCIStudyTool
+
+# Full reads that are expected, by query label: queries that list, count,
+# shuffle or substring-search every term, and the one-time loads of the
+# relationship graph and the term name index
+INTENDED_SCANS = {
+    'get_related_terms': {'term_relationships'},
+    'find_similar_terms': {'terms'},
+    'get_category_summaries': {'terms'},
+    'build_hierarchy': {'terms'},
+    'iter_categories': {'terms'},
+    'iter_terms': {'terms', 'term_details'},
+    'iter_terms(answers_by_id)': {'terms', 'term_details'},
+    'query_examples.sql #2': {'terms'},
+    'query_examples.sql #3': {'terms'},
+    'query_examples.sql #4': {'terms'},
+    'query_examples.sql #10': {'terms'},
+    'query_examples.sql #11': {'terms'},
+    'query_examples.sql #12': {'terms'},
+    'query_examples.sql #13': {'terms'},
+    'query_examples.sql #14': {'terms'},
+}
+
+# Lookup tables with a handful of rows; scanning them, typically as the
+# outer loop of a join, is always fine
+SMALL_TABLES = {'categories', 'questions'}
+
+TABLES = ('categories', 'terms', 'questions', 'answers', 'examples', 'term_relationships', 'term_details',
+          'term_closure', 'term_paths')
+
+LOOP_PATTERN = re.compile(r'^(SCAN|SEARCH) (\S+)')
+ALIAS_PATTERN = re.compile(rf"\b({'|'.join(TABLES)})\s+(?:AS\s+)?(\w+)", re.IGNORECASE)
+
+def traced_queries(conn, label, call):
+    """Run call() and return (label, sql) for every SELECT it sends over conn"""
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        result = call()
+        if hasattr(result, '__next__'):
+            for _ in result:
+                pass
+    finally:
+        conn.set_trace_callback(None)
+    return [(label, sql) for sql in statements if sql.lstrip().upper().startswith(('SELECT', 'WITH'))]
+
+def study_tool_queries(db_path):
+    # Without the result cache, so every call reaches the database
+    tool = HCIStudyTool(db_path, cache_size=0)
+    term_id, term_name, _ = tool.get_random_terms(1)[0]
+    calls = {
+        'get_categories': tool.get_categories,
+        'get_category_terms': lambda: tool.get_category_terms(1),
+        'find_terms': lambda: tool.find_terms('heuristic'),
+        'get_term_details': lambda: tool.get_term_details(term_name),
+        'get_random_terms': lambda: tool.get_random_terms(10),
+        'get_key_answers': lambda: tool.get_key_answers(term_id),
+        'get_term_id': lambda: tool.get_term_id(term_name),
+        'get_descendants': lambda: tool.get_descendants(term_id),
+        'get_breadcrumb': lambda: tool.get_breadcrumb(term_id),
+        'get_subtree_size': lambda: tool.get_subtree_size(term_id),
+        'get_related_terms': lambda: tool.get_related_terms(term_id),
+        'get_connection': lambda: tool.get_connection(term_id, 1),
+        'find_similar_terms': lambda: tool.find_similar_terms('heurstics'),
+        'resolve_term': lambda: tool.resolve_term('usabilty'),
+        'get_nielsens_heuristics': tool.get_nielsens_heuristics,
+        'get_category_summaries': tool.get_category_summaries,
+    }
+    queries = []
+    for label, call in calls.items():
+        queries.extend(traced_queries(tool.conn, label, call))
+    tool.close()
+    return queries
+
+def export_queries(db_path):
+    conn = connect_readonly(db_path)
+    calls = {
+        'build_hierarchy': lambda: export_to_json.build_hierarchy(conn),
+        'iter_categories': lambda: export_to_json.iter_categories(conn),
+        'iter_questions': lambda: export_to_json.iter_questions(conn),
+        'iter_terms': lambda: export_to_json.iter_terms(conn),
+        'iter_terms(answers_by_id)': lambda: export_to_json.iter_terms(conn, answers_by_id=True),
+    }
+    queries = []
+    for label, call in calls.items():
+        queries.extend(traced_queries(conn, label, call))
+    conn.close()
+    return queries
+
+def example_queries(path='query_examples.sql'):
+    """Return (label, sql) for each statement, labelled by its '-- N.' comment"""
+    queries = []
+    label, statement = None, ''
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            match = re.match(r'--\s*(\d+)\.', line)
+            if match:
+                label = f"{path} #{match.group(1)}"
+            if line.lstrip().startswith('--') and not statement.strip():
+                continue
+            statement += line
+            if sqlite3.complete_statement(statement):
+                queries.append((label, statement.strip()))
+                statement = ''
+    return queries
+
+def full_scans(conn, sql):
+    """Return the tables EXPLAIN QUERY PLAN shows being read in full.
+
+    That is every table scanned, plus every table a join reaches from an
+    outer loop that only scans SMALL_TABLES: searching terms by category_id
+    for each category still reads every term. Aliases in the plan are mapped
+    back to table names; FTS5 virtual and shadow tables are skipped.
+    """
+    aliases = {alias: table.lower() for table, alias in ALIAS_PATTERN.findall(sql)}
+    # Nested loops of one join share a parent in the plan, outermost first
+    loops = {}
+    for _, parent, _, detail in conn.execute(f"EXPLAIN QUERY PLAN {sql}"):
+        match = LOOP_PATTERN.match(detail)
+        if not match or 'VIRTUAL TABLE' in detail:
+            continue
+        name = match.group(2).split('.')[-1]
+        table = aliases.get(name, name)
+        if table in TABLES:
+            loops.setdefault(parent, []).append((match.group(1), table))
+
+    scans = set()
+    for join in loops.values():
+        reaches_every_row = None
+        for operation, table in join:
+            if operation == 'SCAN' or reaches_every_row:
+                scans.add(table)
+            if reaches_every_row is None:
+                reaches_every_row = operation == 'SCAN' and table in SMALL_TABLES
+    return scans
+
+def analyzed_copy(db_path):
+    """Return an in-memory copy of db_path with fresh planner statistics"""
+    src = connect_readonly(db_path)
+    conn = sqlite3.connect(':memory:')
+    try:
+        src.backup(conn)
+    finally:
+        src.close()
+    conn.execute("ANALYZE")
+    return conn
+
+def check(db_path=DB_PATH, examples_path='query_examples.sql'):
+    """Return [(label, sql, unexpected scans), ...] for every query checked"""
+    queries = study_tool_queries(db_path) + export_queries(db_path) + example_queries(examples_path)
+    conn = analyzed_copy(db_path)
+    results = []
+    for label, sql in queries:
+        unexpected = full_scans(conn, sql) - SMALL_TABLES - INTENDED_SCANS.get(label, set())
+        results.append((label, sql, unexpected))
+    conn.close()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if any known query does an unintended full table scan")
+    parser.add_argument('--db', default=DB_PATH, help="database whose indexes are checked")
+    parser.add_argument('--examples', default='query_examples.sql', help="SQL file of example queries")
+    args = parser.parse_args()
+
+    results = check(args.db, args.examples)
+    failures = [(label, sql, scans) for label, sql, scans in results if scans]
+    for label, sql, scans in failures:
+        print(f"FULL SCAN of {', '.join(sorted(scans))} in {label}:")
+        print(f"    {' '.join(sql.split())[:200]}")
+
+    print(f"\nChecked {len(results)} queries: {len(failures)} with unintended full scans")
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -18,6 +18,8 @@ CREATE TABLE IF NOT EXISTS terms (
     definition TEXT NOT NULL,
     hierarchy_level INTEGER DEFAULT 0,
     order_num INTEGER,
+    content_hash TEXT,
+    source TEXT,
     FOREIGN KEY (category_id) REFERENCES categories(id),
     FOREIGN KEY (parent_term_id) REFERENCES terms(id)
 );
@@ -35,6 +37,7 @@ CREATE TABLE IF NOT EXISTS answers (
     term_id INTEGER NOT NULL,
     question_id INTEGER NOT NULL,
     answer_text TEXT NOT NULL,
+    content_hash TEXT,
     FOREIGN KEY (term_id) REFERENCES terms(id) ON DELETE CASCADE,
     FOREIGN KEY (question_id) REFERENCES questions(id)
 );
@@ -58,8 +61,284 @@ CREATE TABLE IF NOT EXISTS term_relationships (
 );
 
 -- Create indexes for better query performance
-CREATE INDEX IF NOT EXISTS idx_terms_category ON terms(category_id);
+CREATE INDEX IF NOT EXISTS idx_terms_category ON terms(category_id, order_num);
 CREATE INDEX IF NOT EXISTS idx_terms_parent ON terms(parent_term_id);
+CREATE INDEX IF NOT EXISTS idx_terms_category_name ON terms(category_id, name);
+CREATE INDEX IF NOT EXISTS idx_terms_name ON terms(name);
 CREATE INDEX IF NOT EXISTS idx_answers_term ON answers(term_id);
 CREATE INDEX IF NOT EXISTS idx_answers_question ON answers(question_id);
 CREATE INDEX IF NOT EXISTS idx_examples_term ON examples(term_id);
+
+-- Natural keys used to re-run the populate scripts without duplicating rows
+CREATE UNIQUE INDEX IF NOT EXISTS idx_questions_order ON questions(order_num);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_categories_name ON categories(name);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_terms_natural_key ON terms(category_id, ifnull(parent_term_id, 0), name);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_answers_term_question ON answers(term_id, question_id);
+
+-- The tables below are derived from the ones above. Running this script on a
+-- database created before one of them existed only creates it empty; run
+-- `python3 database.py` instead to also fill it (see REBUILD_SQL there).
+
+-- Full-text search over each term's name, definition, answers and examples,
+-- one row per term (rowid = terms.id), kept in sync by the triggers below
+CREATE VIRTUAL TABLE IF NOT EXISTS terms_fts USING fts5(
+    name, definition, answers, examples,
+    tokenize = 'porter unicode61', prefix = '2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS terms_fts_insert AFTER INSERT ON terms BEGIN
+    INSERT INTO terms_fts (rowid, name, definition, answers, examples)
+    VALUES (new.id, new.name, new.definition, '', '');
+END;
+
+CREATE TRIGGER IF NOT EXISTS terms_fts_update AFTER UPDATE OF name, definition ON terms BEGIN
+    UPDATE terms_fts SET name = new.name, definition = new.definition WHERE rowid = new.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS terms_fts_delete AFTER DELETE ON terms BEGIN
+    DELETE FROM terms_fts WHERE rowid = old.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS answers_fts_insert AFTER INSERT ON answers BEGIN
+    UPDATE terms_fts SET answers = (
+        SELECT group_concat(answer_text, ' ') FROM answers WHERE term_id = new.term_id
+    ) WHERE rowid = new.term_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS answers_fts_update AFTER UPDATE OF answer_text ON answers BEGIN
+    UPDATE terms_fts SET answers = (
+        SELECT group_concat(answer_text, ' ') FROM answers WHERE term_id = new.term_id
+    ) WHERE rowid = new.term_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS answers_fts_delete AFTER DELETE ON answers BEGIN
+    UPDATE terms_fts SET answers = (
+        SELECT ifnull(group_concat(answer_text, ' '), '') FROM answers WHERE term_id = old.term_id
+    ) WHERE rowid = old.term_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS examples_fts_insert AFTER INSERT ON examples BEGIN
+    UPDATE terms_fts SET examples = (
+        SELECT group_concat(example_text, ' ') FROM examples WHERE term_id = new.term_id
+    ) WHERE rowid = new.term_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS examples_fts_delete AFTER DELETE ON examples BEGIN
+    UPDATE terms_fts SET examples = (
+        SELECT ifnull(group_concat(example_text, ' '), '') FROM examples WHERE term_id = old.term_id
+    ) WHERE rowid = old.term_id;
+END;
+
+-- Denormalized copy of each term for the study tool and exporter: one row per
+-- term (term_id = terms.id) with its category name and its answers as a JSON
+-- array of [question_id, question_order, question_text, answer_text] in
+-- question order, kept in sync by the triggers below
+CREATE TABLE IF NOT EXISTS term_details (
+    term_id INTEGER PRIMARY KEY,
+    category_id INTEGER NOT NULL,
+    category_name TEXT NOT NULL,
+    parent_term_id INTEGER,
+    name TEXT NOT NULL,
+    definition TEXT NOT NULL,
+    hierarchy_level INTEGER,
+    order_num INTEGER,
+    answers TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_term_details_name ON term_details(name);
+CREATE INDEX IF NOT EXISTS idx_term_details_category ON term_details(category_id, order_num);
+
+-- A term's term_details row computed from the normalized tables
+CREATE VIEW IF NOT EXISTS term_details_source AS
+SELECT t.id AS term_id, t.category_id, c.name AS category_name, t.parent_term_id, t.name, t.definition,
+       t.hierarchy_level, t.order_num,
+       (SELECT json_group_array(json(answer)) FROM (
+            SELECT json_array(q.id, q.order_num, q.question_text, a.answer_text) AS answer
+            FROM answers a
+            JOIN questions q ON q.id = a.question_id
+            WHERE a.term_id = t.id
+            ORDER BY q.order_num
+       )) AS answers
+FROM terms t
+JOIN categories c ON c.id = t.category_id;
+
+CREATE TRIGGER IF NOT EXISTS terms_details_insert AFTER INSERT ON terms BEGIN
+    INSERT OR REPLACE INTO term_details SELECT * FROM term_details_source WHERE term_id = new.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS terms_details_update AFTER UPDATE ON terms BEGIN
+    DELETE FROM term_details WHERE term_id = old.id;
+    INSERT OR REPLACE INTO term_details SELECT * FROM term_details_source WHERE term_id = new.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS terms_details_delete AFTER DELETE ON terms BEGIN
+    DELETE FROM term_details WHERE term_id = old.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS answers_details_insert AFTER INSERT ON answers BEGIN
+    INSERT OR REPLACE INTO term_details SELECT * FROM term_details_source WHERE term_id = new.term_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS answers_details_update AFTER UPDATE ON answers BEGIN
+    INSERT OR REPLACE INTO term_details SELECT * FROM term_details_source WHERE term_id IN (old.term_id, new.term_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS answers_details_delete AFTER DELETE ON answers BEGIN
+    INSERT OR REPLACE INTO term_details SELECT * FROM term_details_source WHERE term_id = old.term_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS questions_details_update AFTER UPDATE ON questions BEGIN
+    INSERT OR REPLACE INTO term_details SELECT * FROM term_details_source
+    WHERE term_id IN (SELECT term_id FROM answers WHERE question_id IN (old.id, new.id));
+END;
+
+CREATE TRIGGER IF NOT EXISTS questions_details_delete AFTER DELETE ON questions BEGIN
+    INSERT OR REPLACE INTO term_details SELECT * FROM term_details_source
+    WHERE term_id IN (SELECT term_id FROM answers WHERE question_id = old.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS categories_details_update AFTER UPDATE OF name ON categories BEGIN
+    UPDATE term_details SET category_name = new.name WHERE category_id = new.id;
+END;
+
+-- Term hierarchy closure: one row per (ancestor, descendant) pair, including
+-- each term paired with itself at depth 0, so subtree and ancestor queries are
+-- a single index range at any depth
+CREATE TABLE IF NOT EXISTS term_closure (
+    ancestor_id INTEGER NOT NULL,
+    descendant_id INTEGER NOT NULL,
+    depth INTEGER NOT NULL,
+    PRIMARY KEY (ancestor_id, descendant_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_term_closure_descendant ON term_closure(descendant_id, depth);
+
+-- Materialized path of term ids from the root, e.g. '/12/40/41/'
+CREATE TABLE IF NOT EXISTS term_paths (
+    term_id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL
+);
+
+CREATE TRIGGER IF NOT EXISTS terms_closure_insert AFTER INSERT ON terms BEGIN
+    INSERT INTO term_closure (ancestor_id, descendant_id, depth)
+    SELECT new.id, new.id, 0
+    UNION ALL
+    SELECT ancestor_id, new.id, depth + 1 FROM term_closure WHERE descendant_id = new.parent_term_id;
+    INSERT OR REPLACE INTO term_paths (term_id, path)
+    VALUES (new.id, ifnull((SELECT path FROM term_paths WHERE term_id = new.parent_term_id), '/') || new.id || '/');
+END;
+
+-- Moving a term moves its whole subtree: unlink the subtree from the old
+-- ancestors, link it under the new parent's ancestors, then recompute paths
+CREATE TRIGGER IF NOT EXISTS terms_closure_move AFTER UPDATE OF parent_term_id ON terms
+WHEN old.parent_term_id IS NOT new.parent_term_id BEGIN
+    DELETE FROM term_closure
+    WHERE descendant_id IN (SELECT descendant_id FROM term_closure WHERE ancestor_id = new.id)
+      AND ancestor_id IN (SELECT ancestor_id FROM term_closure WHERE descendant_id = new.id AND depth > 0);
+    INSERT INTO term_closure (ancestor_id, descendant_id, depth)
+    SELECT above.ancestor_id, below.descendant_id, above.depth + below.depth + 1
+    FROM term_closure above, term_closure below
+    WHERE above.descendant_id = new.parent_term_id AND below.ancestor_id = new.id;
+    INSERT OR REPLACE INTO term_paths (term_id, path)
+    SELECT moved.descendant_id, (
+        SELECT '/' || group_concat(ancestor_id, '/') || '/' FROM (
+            SELECT ancestor_id FROM term_closure WHERE descendant_id = moved.descendant_id ORDER BY depth DESC
+        )
+    )
+    FROM term_closure moved
+    WHERE moved.ancestor_id = new.id;
+END;
+
+-- A deleted term's children become roots, as they would in a rebuild
+CREATE TRIGGER IF NOT EXISTS terms_closure_delete AFTER DELETE ON terms BEGIN
+    UPDATE term_paths SET path = substr(path, instr(path, '/' || old.id || '/') + length(old.id) + 1)
+    WHERE term_id IN (SELECT descendant_id FROM term_closure WHERE ancestor_id = old.id AND depth > 0);
+    DELETE FROM term_paths WHERE term_id = old.id;
+    DELETE FROM term_closure
+    WHERE descendant_id IN (SELECT descendant_id FROM term_closure WHERE ancestor_id = old.id)
+      AND ancestor_id IN (SELECT ancestor_id FROM term_closure WHERE descendant_id = old.id);
+END;
+
+-- Relationships inferred from the hierarchy, kept in sync by the triggers
+-- below: (term, its parent, 'parent') and (term, its next sibling, 'sibling'),
+-- where siblings share a category and parent and are ordered by id. Linking
+-- only consecutive siblings keeps large families linear instead of
+-- quadratic. Rows of any other type are explicit and written by the
+-- populate scripts
+CREATE INDEX IF NOT EXISTS idx_relationships_term ON term_relationships(term_id);
+CREATE INDEX IF NOT EXISTS idx_relationships_related ON term_relationships(related_term_id);
+
+-- A new term links to its parent and splits the sibling link it lands in
+CREATE TRIGGER IF NOT EXISTS terms_relationships_insert AFTER INSERT ON terms BEGIN
+    DELETE FROM term_relationships
+    WHERE relationship_type = 'sibling'
+      AND term_id = (SELECT max(id) FROM terms
+                     WHERE category_id = new.category_id AND ifnull(parent_term_id, 0) = ifnull(new.parent_term_id, 0)
+                       AND id < new.id)
+      AND related_term_id = (SELECT min(id) FROM terms
+                             WHERE category_id = new.category_id AND ifnull(parent_term_id, 0) = ifnull(new.parent_term_id, 0)
+                               AND id > new.id);
+    INSERT INTO term_relationships (term_id, related_term_id, relationship_type)
+    SELECT new.id, new.parent_term_id, 'parent' WHERE EXISTS (SELECT 1 FROM terms WHERE id = new.parent_term_id)
+    UNION ALL
+    SELECT id, new.id, 'sibling' FROM (
+        SELECT max(id) AS id FROM terms
+        WHERE category_id = new.category_id AND ifnull(parent_term_id, 0) = ifnull(new.parent_term_id, 0) AND id < new.id
+    ) WHERE id IS NOT NULL
+    UNION ALL
+    SELECT new.id, id, 'sibling' FROM (
+        SELECT min(id) AS id FROM terms
+        WHERE category_id = new.category_id AND ifnull(parent_term_id, 0) = ifnull(new.parent_term_id, 0) AND id > new.id
+    ) WHERE id IS NOT NULL;
+END;
+
+-- A moved term leaves its old siblings linked to each other and joins the new ones
+CREATE TRIGGER IF NOT EXISTS terms_relationships_move AFTER UPDATE OF category_id, parent_term_id ON terms
+WHEN old.parent_term_id IS NOT new.parent_term_id OR old.category_id != new.category_id BEGIN
+    DELETE FROM term_relationships
+    WHERE (relationship_type = 'parent' AND term_id = new.id)
+       OR (relationship_type = 'sibling' AND new.id IN (term_id, related_term_id));
+    INSERT INTO term_relationships (term_id, related_term_id, relationship_type)
+    SELECT before.id, after.id, 'sibling'
+    FROM (SELECT max(id) AS id FROM terms
+          WHERE category_id = old.category_id AND ifnull(parent_term_id, 0) = ifnull(old.parent_term_id, 0)
+            AND id < old.id) before,
+         (SELECT min(id) AS id FROM terms
+          WHERE category_id = old.category_id AND ifnull(parent_term_id, 0) = ifnull(old.parent_term_id, 0)
+            AND id > old.id) after
+    WHERE before.id IS NOT NULL AND after.id IS NOT NULL;
+    DELETE FROM term_relationships
+    WHERE relationship_type = 'sibling'
+      AND term_id = (SELECT max(id) FROM terms
+                     WHERE category_id = new.category_id AND ifnull(parent_term_id, 0) = ifnull(new.parent_term_id, 0)
+                       AND id < new.id)
+      AND related_term_id = (SELECT min(id) FROM terms
+                             WHERE category_id = new.category_id AND ifnull(parent_term_id, 0) = ifnull(new.parent_term_id, 0)
+                               AND id > new.id);
+    INSERT INTO term_relationships (term_id, related_term_id, relationship_type)
+    SELECT new.id, new.parent_term_id, 'parent' WHERE EXISTS (SELECT 1 FROM terms WHERE id = new.parent_term_id)
+    UNION ALL
+    SELECT id, new.id, 'sibling' FROM (
+        SELECT max(id) AS id FROM terms
+        WHERE category_id = new.category_id AND ifnull(parent_term_id, 0) = ifnull(new.parent_term_id, 0) AND id < new.id
+    ) WHERE id IS NOT NULL
+    UNION ALL
+    SELECT new.id, id, 'sibling' FROM (
+        SELECT min(id) AS id FROM terms
+        WHERE category_id = new.category_id AND ifnull(parent_term_id, 0) = ifnull(new.parent_term_id, 0) AND id > new.id
+    ) WHERE id IS NOT NULL;
+END;
+
+-- A deleted term's neighbouring siblings are linked to each other instead
+CREATE TRIGGER IF NOT EXISTS terms_relationships_delete AFTER DELETE ON terms BEGIN
+    DELETE FROM term_relationships WHERE term_id = old.id OR related_term_id = old.id;
+    INSERT INTO term_relationships (term_id, related_term_id, relationship_type)
+    SELECT before.id, after.id, 'sibling'
+    FROM (SELECT max(id) AS id FROM terms
+          WHERE category_id = old.category_id AND ifnull(parent_term_id, 0) = ifnull(old.parent_term_id, 0)
+            AND id < old.id) before,
+         (SELECT min(id) AS id FROM terms
+          WHERE category_id = old.category_id AND ifnull(parent_term_id, 0) = ifnull(old.parent_term_id, 0)
+            AND id > old.id) after
+    WHERE before.id IS NOT NULL AND after.id IS NOT NULL;
+END;
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Shared Database Access
+Opens connections to the HCI database with consistent, tuned settings:
+read-only connections for the study tool and exporters, writer connections
+for the populate scripts, and atomic publishing of databases built in memory.
+"""
+
+import argparse
+import os
+import pathlib
+import sqlite3
+import tempfile
+
+DB_PATH = 'hci_exam_review.db'
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'create_database.sql')
+
+# Number of prepared statements each connection keeps compiled
+STATEMENT_CACHE_SIZE = 256
+
+# Map up to 256 MB of the file and keep up to 64 MB of pages cached
+MMAP_SIZE = 256 * 1024 * 1024
+CACHE_SIZE_KB = 64 * 1024
+
+READ_PRAGMAS = [
+    f"PRAGMA mmap_size = {MMAP_SIZE}",
+    f"PRAGMA cache_size = -{CACHE_SIZE_KB}",
+    "PRAGMA temp_store = MEMORY",
+]
+
+# Writers use a rollback journal rather than WAL: a WAL file left next to
+# the database would keep publish() from replacing it while a reader is
+# open. Populate runs are one bulk transaction, so journal syncs are rare.
+WRITE_PRAGMAS = [
+    "PRAGMA journal_mode = DELETE",
+    "PRAGMA synchronous = NORMAL",
+    f"PRAGMA cache_size = -{CACHE_SIZE_KB}",
+    "PRAGMA temp_store = MEMORY",
+]
+
+# Statements that delete and refill each table the sync triggers in
+# create_database.sql maintain, for every term with an id above :since_id
+# (0 rebuilds the whole table). Used after bulk loads and to fill tables
+# added since a database was created.
+REBUILD_SQL = {
+    'terms_fts': ["DELETE FROM terms_fts WHERE rowid > :since_id", """
+        INSERT INTO terms_fts (rowid, name, definition, answers, examples)
+        SELECT t.id, t.name, t.definition,
+               ifnull((SELECT group_concat(answer_text, ' ') FROM answers WHERE term_id = t.id), ''),
+               ifnull((SELECT group_concat(example_text, ' ') FROM examples WHERE term_id = t.id), '')
+        FROM terms t
+        WHERE t.id > :since_id
+    """],
+    'term_details': ["DELETE FROM term_details WHERE term_id > :since_id",
+                     "INSERT INTO term_details SELECT * FROM term_details_source WHERE term_id > :since_id"],
+    # Walks up from each term, so the new terms' rows can be added on their
+    # own; term_paths is computed from term_closure, so it has to come second
+    'term_closure': ["DELETE FROM term_closure WHERE descendant_id > :since_id", """
+        INSERT INTO term_closure (ancestor_id, descendant_id, depth)
+        WITH RECURSIVE closure(ancestor_id, descendant_id, depth) AS (
+            SELECT id, id, 0 FROM terms WHERE id > :since_id
+            UNION ALL
+            SELECT p.id, closure.descendant_id, closure.depth + 1
+            FROM closure
+            JOIN terms t ON t.id = closure.ancestor_id
+            JOIN terms p ON p.id = t.parent_term_id
+        )
+        SELECT ancestor_id, descendant_id, depth FROM closure
+    """],
+    'term_paths': ["DELETE FROM term_paths WHERE term_id > :since_id", """
+        INSERT INTO term_paths (term_id, path)
+        SELECT t.id, (
+            SELECT '/' || group_concat(ancestor_id, '/') || '/' FROM (
+                SELECT ancestor_id FROM term_closure WHERE descendant_id = t.id ORDER BY depth DESC
+            )
+        )
+        FROM terms t
+        WHERE t.id > :since_id
+    """],
+    # Only the relationships inferred from the hierarchy; explicit ones stay.
+    # New terms sort last among their siblings, so the only older rows that
+    # change are the links from each group's previous last sibling.
+    'term_relationships': ["""
+        DELETE FROM term_relationships
+        WHERE relationship_type IN ('parent', 'sibling') AND (term_id > :since_id OR related_term_id > :since_id)
+    """, """
+        INSERT INTO term_relationships (term_id, related_term_id, relationship_type)
+        SELECT t.id, t.parent_term_id, 'parent' FROM terms t JOIN terms p ON p.id = t.parent_term_id
+        WHERE t.id > :since_id
+        UNION ALL
+        SELECT id, next_id, 'sibling' FROM (
+            SELECT id, lead(id) OVER (PARTITION BY category_id, ifnull(parent_term_id, 0) ORDER BY id) AS next_id
+            FROM terms
+        )
+        WHERE next_id > :since_id
+    """],
+}
+
+def _apply_pragmas(conn, pragmas):
+    for pragma in pragmas:
+        conn.execute(pragma)
+    return conn
+
+def connect_readonly(db_path=DB_PATH):
+    """Open an existing database read-only with memory-mapped reads.
+
+    Raises FileNotFoundError if the database does not exist instead of
+    silently creating an empty one.
+    """
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"{db_path} not found")
+    uri = pathlib.Path(db_path).resolve().as_uri() + '?mode=ro'
+    conn = sqlite3.connect(uri, uri=True, cached_statements=STATEMENT_CACHE_SIZE)
+    return _apply_pragmas(conn, READ_PRAGMAS)
+
+def connect_writer(db_path=DB_PATH):
+    """Open (or create) a database for writing with bulk-load friendly settings"""
+    conn = sqlite3.connect(db_path, cached_statements=STATEMENT_CACHE_SIZE)
+    if db_path == ':memory:':
+        # In-memory databases have no journal file
+        return _apply_pragmas(conn, WRITE_PRAGMAS[1:])
+    try:
+        conn.execute(WRITE_PRAGMAS[0])
+    except sqlite3.OperationalError:
+        # A database left in WAL by an older writer can only leave it once
+        # no reader has it open; keep writing in WAL until then
+        pass
+    return _apply_pragmas(conn, WRITE_PRAGMAS[1:])
+
+def optimize(conn):
+    """Gather planner statistics and compact the database before publishing"""
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA optimize")
+    conn.commit()
+    conn.execute("VACUUM")
+
+def publish(conn, db_path=DB_PATH):
+    """Atomically replace db_path with a copy of conn's database.
+
+    The copy is written with the backup API to a temporary file next to
+    db_path and renamed into place, so readers see either the old database
+    or the complete new one. The published file uses a rollback journal.
+    """
+    directory = os.path.dirname(os.path.abspath(db_path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.build-', suffix='.db', dir=directory)
+    os.close(fd)
+    try:
+        # mkstemp creates the file owner-only; keep the old file's permissions
+        os.chmod(tmp_path, os.stat(db_path).st_mode & 0o777 if os.path.exists(db_path) else 0o644)
+        target = sqlite3.connect(tmp_path)
+        try:
+            conn.backup(target)
+        finally:
+            target.close()
+
+        # Fold any WAL left by an older writer into the old file so it can't
+        # be replayed against the new one
+        if os.path.exists(db_path + '-wal'):
+            old = sqlite3.connect(db_path)
+            try:
+                old.execute("PRAGMA journal_mode = DELETE")
+            except sqlite3.OperationalError as e:
+                raise RuntimeError(f"{db_path} is open in WAL mode elsewhere ({e}); "
+                                   "close other connections and rebuild") from None
+            finally:
+                old.close()
+        os.replace(tmp_path, db_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def file_identity(db_path):
+    """Return (device, inode, mtime in ns) of db_path, which changes when publish() replaces it"""
+    st = os.stat(db_path)
+    return st.st_dev, st.st_ino, st.st_mtime_ns
+
+def create_schema(conn):
+    """Create the tables and indexes from create_database.sql if missing.
+
+    Derived tables that a database created before they existed has just
+    gained are filled from REBUILD_SQL.
+    """
+    with open(SCHEMA_PATH, encoding='utf-8') as f:
+        conn.executescript(f.read())
+    if conn.execute("SELECT 1 FROM terms LIMIT 1").fetchone() is None:
+        return
+    for table, statements in REBUILD_SQL.items():
+        if conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() is None:
+            for sql in statements:
+                conn.execute(sql, {'since_id': 0})
+    conn.commit()
+
+def table_exists(conn, name):
+    """Return True if conn's database has a table or virtual table called name"""
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone()
+    return row is not None
+
+def main():
+    parser = argparse.ArgumentParser(description="Create the database schema, or bring an older database up to date")
+    parser.add_argument('--db', default=DB_PATH, help="database to create or upgrade")
+    args = parser.parse_args()
+
+    conn = connect_writer(args.db)
+    try:
+        create_schema(conn)
+    finally:
+        conn.close()
+    print(f"Schema of {args.db} is up to date")
+
+if __name__ == "__main__":
+    main()
@@ -3,81 +3,512 @@
 Export HCI database to JSON for web application
 """
 
-import sqlite3
+import argparse
+import gzip
+import hashlib
+import os
+import shutil
 import json
+import time
+from itertools import groupby
 
-def export_database():
-    conn = sqlite3.connect('hci_exam_review.db')
-    cursor = conn.cursor()
+from database import DB_PATH, connect_readonly, table_exists
+from hierarchy import SUBTREE_CLOSURE, closure_source, get_ancestors, get_subtree_size
+from search_index import build_search_index, write_search_index
 
-    # Get all categories
-    cursor.execute("""
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MANIFEST_VERSION = 1
+COMPACT_SEPARATORS = (',', ':')
+
+def build_hierarchy(conn):
+    """Return (children, roots) adjacency built in one pass over the terms.
+
+    children maps a term id to its child ids and roots maps a category id to
+    its top-level term ids, both in export order.
+    """
+    children = {}
+    roots = {}
+    cursor = conn.execute("""
+        SELECT id, category_id, parent_term_id
+        FROM terms
+        ORDER BY category_id, order_num, id
+    """)
+    for term_id, cat_id, parent_id in cursor:
+        if parent_id is None:
+            roots.setdefault(cat_id, []).append(term_id)
+        else:
+            children.setdefault(parent_id, []).append(term_id)
+    return children, roots
+
+def iter_categories(conn, hierarchy=None):
+    """Yield category objects in display order"""
+    _, roots = hierarchy or build_hierarchy(conn)
+    cursor = conn.execute("""
         SELECT id, name, description
         FROM categories
         ORDER BY order_num
     """)
-    categories = [
-        {'id': cat_id, 'name': name, 'description': desc}
-        for cat_id, name, desc in cursor.fetchall()
-    ]
+    for cat_id, name, desc in cursor:
+        yield {'id': cat_id, 'name': name, 'description': desc, 'rootIds': roots.get(cat_id, [])}
 
-    # Get all questions
-    cursor.execute("""
+def iter_questions(conn):
+    """Yield question objects in display order"""
+    cursor = conn.execute("""
         SELECT id, question_text, order_num
         FROM questions
         ORDER BY order_num
     """)
-    questions = [
-        {'id': q_id, 'text': text, 'order': order}
-        for q_id, text, order in cursor.fetchall()
-    ]
-
-    # Get all terms with their answers
-    cursor.execute("""
-        SELECT t.id, t.category_id, t.name, t.definition
+    for q_id, text, order in cursor:
+        yield {'id': q_id, 'text': text, 'order': order}
+
+def iter_term_rows(conn, root_id=None):
+    """Yield (id, category_id, name, definition, parent_id, level, answers) in export order.
+
+    answers is [(question_id, question_order, question_text, answer_text), ...]
+    in question order, read from term_details in one sequential scan, or
+    from a single ordered join for databases without term_details. With
+    root_id, only that term and its descendants are read.
+    """
+    closure, subtree = '', ''
+    if root_id is not None:
+        closure = closure_source(conn, SUBTREE_CLOSURE)
+        subtree = "WHERE {} IN (SELECT descendant_id FROM term_closure WHERE ancestor_id = :term_id)"
+    params = {'term_id': root_id}
+    if table_exists(conn, 'term_details'):
+        cursor = conn.execute(f"""{closure}
+            SELECT term_id, category_id, name, definition, parent_term_id, hierarchy_level, answers
+            FROM term_details
+            {subtree.format('term_id')}
+            ORDER BY category_id, order_num, term_id
+        """, params)
+        for *term, answers in cursor:
+            yield (*term, json.loads(answers))
+        return
+
+    cursor = conn.execute(f"""{closure}
+        SELECT t.id, t.category_id, t.name, t.definition, t.parent_term_id, t.hierarchy_level,
+               q.id, q.order_num, q.question_text, a.answer_text
         FROM terms t
-        ORDER BY t.category_id, t.order_num
-    """)
+        LEFT JOIN answers a ON a.term_id = t.id
+        LEFT JOIN questions q ON a.question_id = q.id
+        {subtree.format('t.id')}
+        ORDER BY t.category_id, t.order_num, t.id, q.order_num
+    """, params)
+    for term, rows in groupby(cursor, key=lambda row: row[:6]):
+        yield (*term, [row[6:] for row in rows if row[6] is not None])
+
+def iter_terms(conn, answers_by_id=False, hierarchy=None, root_id=None):
+    """Yield term objects with their answers.
 
-    terms = []
-    for term_id, cat_id, name, definition in cursor.fetchall():
-        # Get all answers for this term
-        cursor.execute("""
-            SELECT q.id, q.question_text, a.answer_text
-            FROM answers a
-            JOIN questions q ON a.question_id = q.id
-            WHERE a.term_id = ?
-            ORDER BY q.order_num
-        """, (term_id,))
-
-        answers = {}
-        for q_id, q_text, a_text in cursor.fetchall():
-            answers[q_text] = a_text
-
-        terms.append({
+    Answers are keyed by question text, or by question id when answers_by_id
+    is set. With root_id, only that term's subtree is exported.
+    """
+    children, _ = hierarchy or build_hierarchy(conn)
+    key_index = 0 if answers_by_id else 2
+
+    for term_id, cat_id, name, definition, parent_id, level, answers in iter_term_rows(conn, root_id):
+        yield {
             'id': term_id,
             'categoryId': cat_id,
             'name': name,
             'definition': definition,
-            'answers': answers
-        })
-
-    # Create final data structure
-    data = {
-        'categories': categories,
-        'questions': questions,
-        'terms': terms
+            'parentTermId': parent_id,
+            'hierarchyLevel': level,
+            'childIds': children.get(term_id, []),
+            'answers': {answer[key_index]: answer[3] for answer in answers}
+        }
+
+def resolve_root(conn, root):
+    """Return the id of the term root names, given as an id or an exact term name"""
+    if str(root).isdigit():
+        rows = conn.execute("SELECT id FROM terms WHERE id = ?", (int(root),)).fetchall()
+    else:
+        rows = conn.execute("SELECT id FROM terms WHERE name = ? ORDER BY id", (root,)).fetchall()
+    if not rows:
+        raise ValueError(f"No term {root!r}")
+    if len(rows) > 1:
+        raise ValueError(f"{len(rows)} terms are called {root!r}; pass one of ids "
+                         f"{', '.join(str(term_id) for term_id, in rows)}")
+    return rows[0][0]
+
+def describe_root(conn, root_id):
+    """Return the root object of a subtree export: its id, name, category, breadcrumb and subtree size"""
+    name, cat_id = conn.execute("SELECT name, category_id FROM terms WHERE id = ?", (root_id,)).fetchone()
+    return {
+        'id': root_id,
+        'name': name,
+        'categoryId': cat_id,
+        'breadcrumb': [name for _, name, _ in get_ancestors(conn, root_id)],
+        'subtreeSize': get_subtree_size(conn, root_id),
     }
 
-    # Write to JSON file
-    with open('hci_data.json', 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+def encode_item(item):
+    """Encode one array element the way json.dump(indent=2) nests it"""
+    return json.dumps(item, indent=2, ensure_ascii=False).replace('\n', '\n    ').encode('utf-8')
+
+def hash_item(item):
+    """Return a short content hash for an exported object"""
+    return hashlib.blake2b(repr(item).encode('utf-8'), digest_size=8).hexdigest()
+
+def write_json_array(f, fragments, offsets=None):
+    """Write encoded items as a JSON array nested one level deep, matching json.dump(indent=2)"""
+    count = 0
+    for fragment in fragments:
+        f.write(b'[\n    ' if count == 0 else b',\n    ')
+        if offsets is not None:
+            offsets.append((f.tell(), len(fragment)))
+        f.write(fragment)
+        count += 1
+    f.write(b'\n  ]' if count else b'[]')
+    return count
 
-    print(f"Exported {len(categories)} categories")
-    print(f"Exported {len(terms)} terms")
-    print(f"Data saved to hci_data.json")
+def write_document(f, categories, questions, terms, term_offsets=None):
+    """Write the export document from iterables of encoded items"""
+    f.write(b'{\n  "categories": ')
+    num_categories = write_json_array(f, categories)
+    f.write(b',\n  "questions": ')
+    write_json_array(f, questions)
+    f.write(b',\n  "terms": ')
+    num_terms = write_json_array(f, terms, term_offsets)
+    f.write(b'\n}')
+    return num_categories, num_terms
+
+def stream_export(conn, f):
+    """Write the export document item by item without building it in memory"""
+    hierarchy = build_hierarchy(conn)
+    return write_document(
+        f,
+        map(encode_item, iter_categories(conn, hierarchy)),
+        map(encode_item, iter_questions(conn)),
+        map(encode_item, iter_terms(conn, hierarchy=hierarchy))
+    )
+
+def manifest_path_for(output_path):
+    """Return the hash manifest path kept next to an export file"""
+    return os.path.splitext(output_path)[0] + '.hashes.json'
+
+def load_manifest(manifest_path, output_path):
+    """Load the hash manifest if it still describes the current output file"""
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        stat = os.stat(output_path)
+    except (OSError, ValueError):
+        return None
+
+    if manifest.get('version') != MANIFEST_VERSION:
+        return None
+    if manifest['output'] != {'size': stat.st_size, 'mtimeNs': stat.st_mtime_ns}:
+        return None
+    return manifest
+
+def incremental_export(conn, output_path, manifest_path):
+    """Rewrite the export reusing the encoded bytes of every unchanged term.
+
+    Returns (num_categories, num_terms, stats) where stats counts changed,
+    added, removed and reused terms and records whether the file was written.
+    Nothing is written when no content changed.
+    """
+    manifest = load_manifest(manifest_path, output_path)
+    old_terms = {}
+    if manifest:
+        old_terms = {term_id: (digest, offset, length)
+                     for term_id, digest, offset, length in manifest['terms']}
+
+    hierarchy = build_hierarchy(conn)
+    categories = list(iter_categories(conn, hierarchy))
+    questions = list(iter_questions(conn))
+    sections = {'categories': hash_item(categories), 'questions': hash_item(questions)}
+
+    # Only changed terms keep their object around; the rest are copied from the old file
+    plan = []
+    stats = {'changed': 0, 'added': 0, 'removed': 0, 'reused': 0, 'written': False}
+    for term in iter_terms(conn, hierarchy=hierarchy):
+        digest = hash_item(term)
+        old = old_terms.get(term['id'])
+        if old and old[0] == digest:
+            plan.append((term['id'], digest, None))
+            stats['reused'] += 1
+        else:
+            plan.append((term['id'], digest, term))
+            stats['changed' if old else 'added'] += 1
+    stats['removed'] = len(old_terms.keys() - {term_id for term_id, _, _ in plan})
+
+    unchanged = (
+        manifest is not None
+        and manifest['sections'] == sections
+        and [term_id for term_id, _, _ in plan] == [entry[0] for entry in manifest['terms']]
+        and stats['reused'] == len(plan)
+    )
+    if unchanged:
+        return len(categories), len(plan), stats
+
+    old_bytes = b''
+    if manifest:
+        with open(output_path, 'rb') as f:
+            old_bytes = f.read()
+
+    def term_fragments():
+        for term_id, digest, term in plan:
+            if term is None:
+                _, offset, length = old_terms[term_id]
+                yield old_bytes[offset:offset + length]
+            else:
+                yield encode_item(term)
+
+    offsets = []
+    tmp_path = output_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        write_document(f, map(encode_item, categories), map(encode_item, questions),
+                       term_fragments(), offsets)
+    os.replace(tmp_path, output_path)
+    stats['written'] = True
+
+    stat = os.stat(output_path)
+    new_manifest = {
+        'version': MANIFEST_VERSION,
+        'output': {'size': stat.st_size, 'mtimeNs': stat.st_mtime_ns},
+        'sections': sections,
+        'terms': [[term_id, digest, offset, length]
+                  for (term_id, digest, _), (offset, length) in zip(plan, offsets)]
+    }
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(new_manifest, f, separators=(',', ':'))
+
+    return len(categories), len(plan), stats
+
+def shard_export(conn, shard_dir):
+    """Write one JSON shard per category plus a manifest for lazy loading.
+
+    Shards whose content hash matches the previous manifest are left untouched.
+    Returns (num_categories, num_terms, num_shards_written).
+    """
+    os.makedirs(shard_dir, exist_ok=True)
+    manifest_file = os.path.join(shard_dir, 'manifest.json')
+    try:
+        with open(manifest_file, encoding='utf-8') as f:
+            old_hashes = {cat['id']: cat['hash'] for cat in json.load(f)['categories']}
+    except (OSError, ValueError, KeyError):
+        old_hashes = {}
+
+    hierarchy = build_hierarchy(conn)
+    categories = list(iter_categories(conn, hierarchy))
+    known_ids = {cat['id'] for cat in categories}
+    shards = {}
+    written = 0
+
+    def write_shard(cat_id, terms):
+        nonlocal written
+        url = f"category-{cat_id}.json"
+        body = json.dumps({'categoryId': cat_id, 'terms': terms}, indent=2, ensure_ascii=False).encode('utf-8')
+        digest = hashlib.blake2b(body, digest_size=8).hexdigest()
+        path = os.path.join(shard_dir, url)
+        if old_hashes.get(cat_id) != digest or not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.write(body)
+            written += 1
+        shards[cat_id] = {'termCount': len(terms), 'url': url, 'hash': digest}
+
+    # Terms arrive ordered by category, so only one shard is held in memory at a time
+    for cat_id, terms in groupby(iter_terms(conn, hierarchy=hierarchy), key=lambda term: term['categoryId']):
+        if cat_id in known_ids:
+            write_shard(cat_id, list(terms))
+    for cat_id in known_ids - shards.keys():
+        write_shard(cat_id, [])
+
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'categories': [dict(cat, **shards[cat['id']]) for cat in categories],
+        'questions': list(iter_questions(conn))
+    }
+    with open(manifest_file, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+    num_terms = sum(shard['termCount'] for shard in shards.values())
+    return len(categories), num_terms, written
+
+def compact_path_for(output_path):
+    """Return the compact export path kept next to an export file"""
+    return os.path.splitext(output_path)[0] + '.min.json'
+
+def compact_export(conn, output_path):
+    """Write the compact export plus precompressed siblings.
+
+    Answers are keyed by question id and the document has no indentation.
+    Returns (num_categories, num_terms, written_paths).
+    """
+    def write_array(f, items):
+        count = 0
+        for item in items:
+            if count:
+                f.write(b',')
+            f.write(json.dumps(item, separators=COMPACT_SEPARATORS, ensure_ascii=False).encode('utf-8'))
+            count += 1
+        return count
+
+    hierarchy = build_hierarchy(conn)
+    with open(output_path, 'wb') as f:
+        f.write(b'{"categories":[')
+        num_categories = write_array(f, iter_categories(conn, hierarchy))
+        f.write(b'],"questions":[')
+        write_array(f, iter_questions(conn))
+        f.write(b'],"terms":[')
+        num_terms = write_array(f, iter_terms(conn, answers_by_id=True, hierarchy=hierarchy))
+        f.write(b']}')
+
+    written = [output_path]
+    with open(output_path, 'rb') as src, open(output_path + '.gz', 'wb') as raw:
+        # mtime=0 keeps the archive byte-identical across rebuilds
+        with gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=9, mtime=0) as dst:
+            shutil.copyfileobj(src, dst)
+    written.append(output_path + '.gz')
+
+    if brotli is not None:
+        compressor = brotli.Compressor(quality=11)
+        with open(output_path, 'rb') as src, open(output_path + '.br', 'wb') as dst:
+            for chunk in iter(lambda: src.read(1 << 16), b''):
+                dst.write(compressor.process(chunk))
+            dst.write(compressor.finish())
+        written.append(output_path + '.br')
+
+    return num_categories, num_terms, written
+
+def compare_formats(paths, repeat=5):
+    """Print file size, compressed sizes and best-of-repeat parse time for each export"""
+    print(f"\n{'File':<24} {'Bytes':>10} {'.gz':>10} {'.br':>10} {'Parse ms':>10}")
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, 'rb') as f:
+            raw = f.read()
+        gz_size = len(gzip.compress(raw, 9))
+        br_size = len(brotli.compress(raw)) if brotli is not None else None
+
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            json.loads(raw)
+            best = min(best, time.perf_counter() - start)
+
+        br_text = f"{br_size:>10}" if br_size is not None else f"{'-':>10}"
+        print(f"{os.path.basename(path):<24} {len(raw):>10} {gz_size:>10} {br_text} {best * 1000:>10.2f}")
+
+def search_index_path_for(output_path):
+    """Return the search index path kept next to an export file"""
+    return os.path.splitext(output_path)[0] + '.search.json'
+
+def export_database(db_path=DB_PATH, output_path='hci_data.json', stream=False,
+                    incremental=False, shard_dir=None, compact=False, search_index=False, root=None):
+    """Export db_path in the requested format; return (categories, terms) exported.
+
+    stream, incremental, shard_dir and compact are alternative formats;
+    raises ValueError if more than one is requested. root (a term id or
+    name) exports only that term's subtree, in the default format.
+    """
+    modes = [name for name, requested in (('stream', stream), ('incremental', incremental),
+                                          ('shard_dir', shard_dir), ('compact', compact)) if requested]
+    if len(modes) > 1:
+        raise ValueError(f"Choose one export format, not {' and '.join(modes)}")
+    if root is not None and modes:
+        raise ValueError(f"A subtree export can't also be {modes[0]}")
+    conn = connect_readonly(db_path)
+
+    if search_index:
+        index_path = search_index_path_for(output_path)
+        index = build_search_index(iter_terms(conn))
+        write_search_index(index, index_path)
+        print(f"Indexed {len(index['postings'])} tokens into {index_path}")
+
+    if compact:
+        # Refresh the regular export too, so the comparison is against current data
+        with open(output_path, 'wb') as f:
+            stream_export(conn, f)
+        compact_output = compact_path_for(output_path)
+        num_categories, num_terms, written = compact_export(conn, compact_output)
+        print(f"Wrote {', '.join(written)}")
+        compare_formats([output_path, compact_output])
+        output_path = compact_output
+    elif shard_dir:
+        num_categories, num_terms, written = shard_export(conn, shard_dir)
+        print(f"Rewrote {written} of {num_categories} category shards")
+        output_path = os.path.join(shard_dir, 'manifest.json')
+    elif incremental:
+        num_categories, num_terms, stats = incremental_export(
+            conn, output_path, manifest_path_for(output_path))
+        print(f"Terms changed: {stats['changed']}, added: {stats['added']}, "
+              f"removed: {stats['removed']}, reused: {stats['reused']}")
+        if not stats['written']:
+            print("No changes since the last export")
+    elif stream:
+        with open(output_path, 'wb') as f:
+            num_categories, num_terms = stream_export(conn, f)
+    elif root is not None:
+        root_id = resolve_root(conn, root)
+        hierarchy = build_hierarchy(conn)
+        root_info = describe_root(conn, root_id)
+        data = {
+            'root': root_info,
+            'categories': [dict(category, rootIds=[root_id]) for category in iter_categories(conn, hierarchy)
+                           if category['id'] == root_info['categoryId']],
+            'questions': list(iter_questions(conn)),
+            'terms': list(iter_terms(conn, hierarchy=hierarchy, root_id=root_id))
+        }
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        num_categories, num_terms = len(data['categories']), len(data['terms'])
+        print(f"Subtree of {' > '.join(root_info['breadcrumb'] + [root_info['name']])}")
+    else:
+        # Create final data structure
+        hierarchy = build_hierarchy(conn)
+        data = {
+            'categories': list(iter_categories(conn, hierarchy)),
+            'questions': list(iter_questions(conn)),
+            'terms': list(iter_terms(conn, hierarchy=hierarchy))
+        }
+
+        # Write to JSON file
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        num_categories, num_terms = len(data['categories']), len(data['terms'])
+
+    print(f"Exported {num_categories} categories")
+    print(f"Exported {num_terms} terms")
+    print(f"Data saved to {output_path}")
 
     conn.close()
+    return num_categories, num_terms
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the HCI database to JSON")
+    parser.add_argument('--db', default=DB_PATH, help="SQLite database to export")
+    parser.add_argument('--output', default='hci_data.json', help="JSON file to write")
+    formats = parser.add_mutually_exclusive_group()
+    formats.add_argument('--stream', action='store_true',
+                         help="write terms as they are read instead of building the document in memory")
+    formats.add_argument('--incremental', action='store_true',
+                         help="only re-encode terms whose content changed since the last incremental export")
+    formats.add_argument('--shards', metavar='DIR',
+                         help="write one file per category plus manifest.json into DIR instead of --output")
+    formats.add_argument('--compact', action='store_true',
+                         help="also write a compact .min.json keyed by question id, plus .gz/.br siblings, "
+                              "and compare it with --output")
+    parser.add_argument('--search-index', action='store_true',
+                        help="also write a keyword index (.search.json) next to the output")
+    parser.add_argument('--root', metavar='TERM',
+                        help="export only this term (an id or exact name) and its descendants, "
+                             "with its breadcrumb and subtree size")
+    args = parser.parse_args()
+
+    try:
+        export_database(args.db, args.output, stream=args.stream, incremental=args.incremental,
+                        shard_dir=args.shards, compact=args.compact, search_index=args.search_index,
+                        root=args.root)
+    except ValueError as e:
+        parser.error(str(e))
 
 if __name__ == "__main__":
-    export_database()
+    main()
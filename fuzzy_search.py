@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Typo-Tolerant Term Lookup
+A trigram index over term names and their aliases (the name without its
+parenthetical and the parenthetical itself, e.g. "UX" for "User Experience
+(UX)") for finding terms despite misspellings like "heurstics".
+
+Candidates are gathered only from the postings of the query's rarest
+trigrams: a name sharing at least k of the query's n trigrams must contain
+one of its n - k + 1 rarest ones, so common trigrams never need scanning
+and lookups stay fast as the course grows.
+"""
+
+import math
+import re
+
+from search_index import TOKEN_PATTERN, normalize
+
+# Fraction of the query's trigrams a name must contain to match
+MIN_SIMILARITY = 0.5
+
+PARENTHETICAL_PATTERN = re.compile(r"\s*\(([^)]*)\)")
+
+def words(text):
+    return TOKEN_PATTERN.findall(normalize(text))
+
+def padded(text):
+    """Return text's normalized words, each padded like '  word ', joined into one string.
+
+    Every trigram of a word occurs in this string, and no query trigram
+    can match across a word boundary.
+    """
+    return ''.join(f"  {word} " for word in words(text))
+
+def trigrams(text):
+    """Return the set of trigrams of text's padded words"""
+    return {f"  {word} "[i:i + 3] for word in words(text) for i in range(len(word) + 1)}
+
+def aliases(name):
+    """Return the distinct names a term can be looked up by"""
+    names = [name, PARENTHETICAL_PATTERN.sub('', name)]
+    names.extend(PARENTHETICAL_PATTERN.findall(name))
+    return list(dict.fromkeys(alias.strip() for alias in names if alias.strip()))
+
+class TermNameIndex:
+    """Trigram postings over every term's aliases, rebuilt when the database changes"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.term_ids = []
+        self.texts = []
+        self.sizes = []
+        self.postings = {}
+        self.data_version = None
+
+    def refresh(self):
+        """Index every term name, unless nothing has changed since the last build"""
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self.data_version:
+            return
+        self.term_ids, self.texts, self.sizes, self.postings = [], [], [], {}
+        for term_id, name in self.conn.execute("SELECT id, name FROM terms"):
+            for alias in aliases(name):
+                entry = len(self.texts)
+                alias_trigrams = trigrams(alias)
+                self.term_ids.append(term_id)
+                self.texts.append(padded(alias))
+                self.sizes.append(len(alias_trigrams))
+                for trigram in alias_trigrams:
+                    self.postings.setdefault(trigram, []).append(entry)
+        self.data_version = data_version
+
+    def search(self, query, limit=10, min_similarity=MIN_SIMILARITY):
+        """Return up to limit [(term id, similarity), ...] best match first.
+
+        Similarity is the fraction of the query's trigrams found in the
+        term's best-matching alias; ties go to the alias closest in length
+        to the query, so "usabilty" ranks Usability above Usability
+        Engineering.
+        """
+        self.refresh()
+        query_trigrams = trigrams(query)
+        if not query_trigrams:
+            return []
+        needed = math.ceil(min_similarity * len(query_trigrams))
+        rarest = sorted(query_trigrams, key=lambda trigram: len(self.postings.get(trigram, ())))
+        candidates = set()
+        for trigram in rarest[:len(query_trigrams) - needed + 1]:
+            candidates.update(self.postings.get(trigram, ()))
+
+        best = {}
+        for entry in candidates:
+            text = self.texts[entry]
+            shared = sum(trigram in text for trigram in query_trigrams)
+            if shared < needed:
+                continue
+            score = (shared / len(query_trigrams), shared / (len(query_trigrams) + self.sizes[entry] - shared))
+            term_id = self.term_ids[entry]
+            if score > best.get(term_id, (0, 0)):
+                best[term_id] = score
+
+        ranked = sorted(best.items(), key=lambda item: (-item[1][0], -item[1][1], item[0]))
+        return [(term_id, similarity) for term_id, (similarity, _) in ranked[:limit]]
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Term Hierarchy Queries
+Descendant, ancestor and subtree-size lookups over the term_closure table.
+Each is one indexed query whatever the depth of the tree, instead of a walk
+down parent_term_id one level at a time. Shared by the study tool and the
+exporter.
+
+Databases created before term_closure existed get the same answers from a
+recursive walk of parent_term_id, named term_closure so the queries below
+read it in place of the table.
+"""
+
+from database import table_exists
+
+# term_closure rows for :term_id and everything below it
+SUBTREE_CLOSURE = """
+    WITH RECURSIVE term_closure(ancestor_id, descendant_id, depth) AS (
+        SELECT id, id, 0 FROM terms WHERE id = :term_id
+        UNION ALL
+        SELECT closure.ancestor_id, t.id, closure.depth + 1
+        FROM term_closure closure
+        JOIN terms t ON t.parent_term_id = closure.descendant_id
+    )
+"""
+
+# term_closure rows for :term_id and everything above it
+ANCESTOR_CLOSURE = """
+    WITH RECURSIVE term_closure(ancestor_id, descendant_id, depth) AS (
+        SELECT id, id, 0 FROM terms WHERE id = :term_id
+        UNION ALL
+        SELECT t.parent_term_id, closure.descendant_id, closure.depth + 1
+        FROM term_closure closure
+        JOIN terms t ON t.id = closure.ancestor_id
+        WHERE t.parent_term_id IS NOT NULL
+    )
+"""
+
+def closure_source(conn, walk):
+    """Return '' when conn has a term_closure table, else the walk CTE standing in for it"""
+    return '' if table_exists(conn, 'term_closure') else walk
+
+def get_descendants(conn, term_id, max_depth=None):
+    """Return [(id, name, depth), ...] for every term below term_id, shallowest first.
+
+    depth is 1 for children, 2 for grandchildren and so on; max_depth
+    limits how far down to go.
+    """
+    return conn.execute(closure_source(conn, SUBTREE_CLOSURE) + """
+        SELECT t.id, t.name, c.depth
+        FROM term_closure c
+        JOIN terms t ON t.id = c.descendant_id
+        WHERE c.ancestor_id = :term_id AND c.depth > 0 AND (:max_depth IS NULL OR c.depth <= :max_depth)
+        ORDER BY c.depth, t.order_num, t.id
+    """, {'term_id': term_id, 'max_depth': max_depth}).fetchall()
+
+def get_ancestors(conn, term_id):
+    """Return [(id, name, depth), ...] for the terms above term_id, root first"""
+    return conn.execute(closure_source(conn, ANCESTOR_CLOSURE) + """
+        SELECT t.id, t.name, c.depth
+        FROM term_closure c
+        JOIN terms t ON t.id = c.ancestor_id
+        WHERE c.descendant_id = :term_id AND c.depth > 0
+        ORDER BY c.depth DESC
+    """, {'term_id': term_id}).fetchall()
+
+def get_subtree_size(conn, term_id):
+    """Return the number of terms in term_id's subtree, counting the term itself"""
+    return conn.execute(closure_source(conn, SUBTREE_CLOSURE) +
+                        "SELECT COUNT(*) FROM term_closure WHERE ancestor_id = :term_id",
+                        {'term_id': term_id}).fetchone()[0]
+
+def get_path(conn, term_id):
+    """Return the term's materialized path of ids from the root, e.g. '/12/40/41/', or None"""
+    if not table_exists(conn, 'term_paths'):
+        ancestors = get_ancestors(conn, term_id)
+        if not ancestors and not conn.execute("SELECT 1 FROM terms WHERE id = ?", (term_id,)).fetchone():
+            return None
+        return '/' + ''.join(f"{ancestor_id}/" for ancestor_id, _, _ in ancestors) + f"{term_id}/"
+    row = conn.execute("SELECT path FROM term_paths WHERE term_id = ?", (term_id,)).fetchone()
+    return row[0] if row else None
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Course Content Ingestion
+Loads course content from declarative JSON Lines files instead of Python
+insert calls, streaming records through validate -> resolve parents ->
+batch insert so large courses load with bounded memory.
+
+Each line is one record:
+  {"type": "question", "order": 1, "text": "What does it mean?"}
+  {"type": "category", "order": 1, "name": "General", "description": "..."}
+  {"type": "term", "category": "General", "name": "Usability", "definition": "...",
+   "parent": null, "order": 6, "answers": {"1": "...", "2": "..."}, "examples": ["..."]}
+  {"type": "relationship", "category": "General", "term": "Usability",
+   "related": "Usefulness", "relationship": "compare_with"}
+
+Terms are identified within their category by "key" (defaulting to "name");
+"parent" refers to another term's key in the same category. Answers are keyed
+by question order number. A relationship names its two terms by key, the
+related one in "related_category" when that differs from "category"; it may
+refer to terms loaded later in the file or already in the database. Parent
+and sibling relationships follow from the hierarchy and aren't records. The
+dump command writes an existing database in this format, so the populate
+scripts' content round-trips through it.
+"""
+
+import argparse
+import json
+import sys
+from itertools import groupby
+
+from database import DB_PATH, connect_readonly, connect_writer
+from populate_common import INFERRED_RELATIONSHIPS, bulk_load
+
+BATCH_SIZE = 5000
+
+RECORD_FIELDS = {
+    'question': {'order', 'text'},
+    'category': {'order', 'name'},
+    'term': {'category', 'name', 'definition'},
+    'relationship': {'category', 'term', 'related', 'relationship'},
+}
+
+class IngestError(ValueError):
+    """Raised when a content file contains an invalid or unresolvable record"""
+
+def read_records(paths):
+    """Yield (location, record) for every non-blank line of every file"""
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for line_num, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                location = f"{path}:{line_num}"
+                try:
+                    yield location, json.loads(line)
+                except ValueError as e:
+                    raise IngestError(f"{location}: invalid JSON ({e})") from None
+
+def validate(records):
+    """Check each record's type and required fields"""
+    for location, record in records:
+        fields = RECORD_FIELDS.get(record.get('type'))
+        if fields is None:
+            raise IngestError(f"{location}: unknown record type {record.get('type')!r}")
+        missing = fields - record.keys()
+        if missing:
+            raise IngestError(f"{location}: missing {', '.join(sorted(missing))}")
+        if record['type'] == 'term':
+            answers = record.get('answers', {})
+            if not all(str(key).isdigit() for key in answers):
+                raise IngestError(f"{location}: answers must be keyed by question number")
+        if record['type'] == 'relationship' and record['relationship'] in INFERRED_RELATIONSHIPS:
+            raise IngestError(f"{location}: {record['relationship']} relationships follow from the hierarchy")
+        yield location, record
+
+class ParentResolver:
+    """Assign term ids and hierarchy levels, holding back terms whose parent hasn't appeared.
+
+    Only (category, key) -> (id, level) and the terms still waiting for a
+    parent are kept in memory.
+    """
+
+    def __init__(self, next_id):
+        self.next_id = next_id
+        self.known = {}
+        self.waiting = {}
+
+    def resolve(self, location, term):
+        """Return the terms (with 'id' and 'level' set) that can be inserted now"""
+        category = term['category']
+        parent = term.get('parent')
+        if parent is not None and (category, parent) not in self.known:
+            self.waiting.setdefault((category, parent), []).append((location, term))
+            return []
+
+        ready = []
+        pending = [(location, term)]
+        while pending:
+            location, term = pending.pop()
+            key = (term['category'], term.get('key', term['name']))
+            if key in self.known:
+                raise IngestError(f"{location}: duplicate term {key[1]!r} in {key[0]!r}; give one a 'key'")
+
+            parent_key = (term['category'], term['parent']) if term.get('parent') is not None else None
+            parent_id, parent_level = self.known[parent_key] if parent_key else (None, -1)
+            term['id'], term['parent_id'], term['level'] = self.next_id, parent_id, parent_level + 1
+            self.known[key] = (term['id'], term['level'])
+            self.next_id += 1
+            ready.append(term)
+
+            # Children that arrived before this term can now be placed
+            pending.extend(reversed(self.waiting.pop(key, [])))
+        return ready
+
+    def check_complete(self):
+        for (category, parent), terms in self.waiting.items():
+            location = terms[0][0]
+            raise IngestError(f"{location}: parent {parent!r} not found in {category!r}")
+
+def resolve_parents(records, conn):
+    """Attach ids and parent ids to terms, passing other records straight through.
+
+    Relationships are held back until every term is placed, then given the
+    ids of their two terms.
+    """
+    next_id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM terms").fetchone()[0]
+    resolver = ParentResolver(next_id)
+    relationships = []
+    for location, record in records:
+        if record['type'] == 'term':
+            for term in resolver.resolve(location, record):
+                yield location, term
+        elif record['type'] == 'relationship':
+            relationships.append((location, record))
+        else:
+            yield location, record
+    resolver.check_complete()
+
+    def term_id(location, category, key):
+        if (category, key) in resolver.known:
+            return resolver.known[category, key][0]
+        rows = conn.execute("""
+            SELECT t.id FROM terms t JOIN categories c ON t.category_id = c.id
+            WHERE c.name = ? AND t.name = ?
+        """, (category, key)).fetchall()
+        if len(rows) != 1:
+            found = 'not found' if not rows else f"ambiguous ({len(rows)} terms)"
+            raise IngestError(f"{location}: term {key!r} {found} in {category!r}")
+        return rows[0][0]
+
+    for location, record in relationships:
+        record['term_id'] = term_id(location, record['category'], record['term'])
+        record['related_id'] = term_id(location, record.get('related_category', record['category']),
+                                       record['related'])
+        yield location, record
+
+def batch_insert(records, conn, batch_size=BATCH_SIZE):
+    """Insert records in executemany batches; return counts per record type"""
+    categories = dict(conn.execute("SELECT name, id FROM categories"))
+    questions = dict(conn.execute("SELECT order_num, id FROM questions"))
+    terms, answers, examples, relationships = [], [], [], []
+    counts = {'question': 0, 'category': 0, 'term': 0, 'relationship': 0}
+
+    def flush():
+        conn.executemany("""
+            INSERT INTO terms (id, category_id, parent_term_id, name, definition, hierarchy_level, order_num)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, terms)
+        conn.executemany("INSERT INTO answers (term_id, question_id, answer_text) VALUES (?, ?, ?)", answers)
+        conn.executemany("INSERT INTO examples (term_id, example_text) VALUES (?, ?)", examples)
+        conn.executemany("""
+            INSERT INTO term_relationships (term_id, related_term_id, relationship_type) VALUES (?, ?, ?)
+        """, relationships)
+        for rows in (terms, answers, examples, relationships):
+            rows.clear()
+
+    for location, record in records:
+        counts[record['type']] += 1
+        if record['type'] == 'question':
+            cursor = conn.execute("INSERT INTO questions (order_num, question_text) VALUES (?, ?)",
+                                  (record['order'], record['text']))
+            questions[record['order']] = cursor.lastrowid
+        elif record['type'] == 'category':
+            cursor = conn.execute("INSERT INTO categories (order_num, name, description) VALUES (?, ?, ?)",
+                                  (record['order'], record['name'], record.get('description')))
+            categories[record['name']] = cursor.lastrowid
+        elif record['type'] == 'relationship':
+            relationships.append((record['term_id'], record['related_id'], record['relationship']))
+            if len(relationships) >= batch_size:
+                flush()
+        else:
+            if record['category'] not in categories:
+                raise IngestError(f"{location}: unknown category {record['category']!r}")
+            terms.append((record['id'], categories[record['category']], record['parent_id'],
+                          record['name'], record['definition'], record['level'], record.get('order', 0)))
+            for question_num, answer_text in record.get('answers', {}).items():
+                if int(question_num) not in questions:
+                    raise IngestError(f"{location}: unknown question {question_num}")
+                answers.append((record['id'], questions[int(question_num)], answer_text))
+            for example_text in record.get('examples', []):
+                examples.append((record['id'], example_text))
+            if len(terms) >= batch_size:
+                flush()
+    flush()
+    return counts
+
+def ingest(paths, db_path=DB_PATH):
+    """Load content files into db_path in one transaction and return record counts.
+
+    Content files only add terms, so even a load into a populated database
+    suspends the sync triggers and fills in the new terms' derived rows once.
+    """
+    conn = connect_writer(db_path)
+    try:
+        with bulk_load(conn, rebuild=True):
+            records = resolve_parents(validate(read_records(paths)), conn)
+            return batch_insert(records, conn)
+    finally:
+        conn.close()
+
+def dump(db_path, output_path):
+    """Write an existing database as content records; return the number of terms"""
+    conn = connect_readonly(db_path)
+    count = 0
+    with open(output_path, 'w', encoding='utf-8') as f:
+        def write(record):
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+        for order, text in conn.execute("SELECT order_num, question_text FROM questions ORDER BY id"):
+            write({'type': 'question', 'order': order, 'text': text})
+        for order, name, description in conn.execute(
+                "SELECT order_num, name, description FROM categories ORDER BY id"):
+            write({'type': 'category', 'order': order, 'name': name, 'description': description})
+
+        # Names repeated within a category need an explicit key to be referenced unambiguously
+        ambiguous = set(conn.execute("""
+            SELECT category_id, name FROM terms GROUP BY category_id, name HAVING COUNT(*) > 1
+        """))
+        keys = {}
+        term_categories = {}
+
+        # Answers and examples come from two ordered scans merged with the terms
+        answers = groupby(conn.execute("""
+            SELECT a.term_id, q.order_num, a.answer_text FROM answers a
+            JOIN questions q ON a.question_id = q.id
+            ORDER BY a.term_id, a.id
+        """), key=lambda row: row[0])
+        examples = groupby(conn.execute("""
+            SELECT term_id, example_text FROM examples ORDER BY term_id, id
+        """), key=lambda row: row[0])
+        next_answers = next(answers, (None, ()))
+        next_examples = next(examples, (None, ()))
+
+        cursor = conn.cursor().execute("""
+            SELECT t.id, t.category_id, c.name, t.parent_term_id, t.name, t.definition, t.order_num
+            FROM terms t
+            JOIN categories c ON t.category_id = c.id
+            ORDER BY t.id
+        """)
+        for term_id, cat_id, category, parent_id, name, definition, order in cursor:
+            while next_answers[0] is not None and next_answers[0] < term_id:
+                next_answers = next(answers, (None, ()))
+            while next_examples[0] is not None and next_examples[0] < term_id:
+                next_examples = next(examples, (None, ()))
+
+            keys[term_id] = f"{name} #{term_id}" if (cat_id, name) in ambiguous else name
+            term_categories[term_id] = category
+            record = {'type': 'term', 'category': category, 'name': name}
+            if keys[term_id] != name:
+                record['key'] = keys[term_id]
+            record.update({'definition': definition, 'parent': keys.get(parent_id), 'order': order})
+
+            record['answers'] = {}
+            if next_answers[0] == term_id:
+                record['answers'] = {str(q): a for _, q, a in next_answers[1]}
+            if next_examples[0] == term_id:
+                record['examples'] = [text for _, text in next_examples[1]]
+            write(record)
+            count += 1
+
+        placeholders = ', '.join('?' * len(INFERRED_RELATIONSHIPS))
+        for term_id, related_id, relationship in conn.execute(f"""
+            SELECT term_id, related_term_id, relationship_type FROM term_relationships
+            WHERE relationship_type NOT IN ({placeholders})
+            ORDER BY id
+        """, INFERRED_RELATIONSHIPS):
+            record = {'type': 'relationship', 'category': term_categories[term_id], 'term': keys[term_id]}
+            if term_categories[related_id] != record['category']:
+                record['related_category'] = term_categories[related_id]
+            record.update({'related': keys[related_id], 'relationship': relationship})
+            write(record)
+    conn.close()
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description="Load or dump course content as JSON Lines")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    load_parser = subparsers.add_parser('load', help="load content files into a database")
+    load_parser.add_argument('files', nargs='+', help="JSON Lines content files, loaded in order")
+    load_parser.add_argument('--db', default=DB_PATH, help="database to load into (schema must exist)")
+
+    dump_parser = subparsers.add_parser('dump', help="write a database's content as JSON Lines")
+    dump_parser.add_argument('--db', default=DB_PATH, help="database to dump")
+    dump_parser.add_argument('--output', required=True, help="JSON Lines file to write")
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'load':
+            counts = ingest(args.files, args.db)
+            print(f"Loaded {counts['question']} questions, {counts['category']} categories, "
+                  f"{counts['term']} terms and {counts['relationship']} relationships into {args.db}")
+        else:
+            count = dump(args.db, args.output)
+            print(f"Dumped {count} terms to {args.output}")
+    except IngestError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
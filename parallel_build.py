@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Parallel Database Build
+Builds the course sections into separate temporary SQLite files on a process
+pool, then merges them into the final database with ATTACH and bulk
+INSERT ... SELECT, shifting each section's ids past the rows already merged.
+
+Sections are merged in the order the populate scripts run them, so the
+result has the same ids as a serial build. The final database is assembled
+in memory, analyzed and vacuumed, then published atomically, so readers
+never see a half-built database.
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from database import DB_PATH, connect_writer, create_schema, optimize, publish
+from populate_common import bulk_load, drop_secondary_indexes, recreate_indexes, resume_sync_triggers, suspend_sync_triggers, upserting
+from populate_database import insert_categories, insert_questions
+
+# Groups of (module, function) in serial build order. Functions in one group
+# run together on one connection because later ones look up earlier terms.
+SECTION_GROUPS = [
+    [('populate_database', 'populate_general_section')],
+    [('populate_database', 'populate_ux_in_se_section')],
+    [('populate_database', 'populate_overall_ux_process')],
+    [('populate_analysis', 'populate_analysis_section')],
+    [('populate_analysis', 'populate_design_informing_models')],
+    # The remaining Design terms hang under Design Thinking
+    [('populate_design', 'populate_design_section'), ('populate_remaining', 'populate_remaining_design')],
+    [('populate_remaining', 'populate_design_production')],
+    [('populate_remaining', 'populate_design_guidelines')],
+    [('populate_remaining', 'populate_prototyping')],
+    [('populate_remaining', 'populate_evaluation')],
+]
+
+def build_section(group, section_path):
+    """Build one section group into its own database in a worker process.
+
+    Returns (section_path, seconds). The populate functions' progress output
+    is captured so workers don't interleave.
+    """
+    start = time.perf_counter()
+    conn = connect_writer(':memory:')
+    try:
+        create_schema(conn)
+        with contextlib.redirect_stdout(io.StringIO()), bulk_load(conn):
+            for module_name, function_name in group:
+                # Tag terms with their script, as a serial run would, so later upserts can prune them
+                with upserting(conn, module_name):
+                    getattr(importlib.import_module(module_name), function_name)(conn)
+        target = sqlite3.connect(section_path)
+        conn.backup(target)
+        target.close()
+    finally:
+        conn.close()
+    return section_path, time.perf_counter() - start
+
+def merge_section(conn, section_path):
+    """Append one section database's rows to conn, offsetting its term ids.
+
+    Returns the number of terms merged.
+    """
+    conn.execute("ATTACH DATABASE ? AS section", (section_path,))
+    try:
+        offset = conn.execute("SELECT COALESCE(MAX(id), 0) FROM main.terms").fetchone()[0]
+        conn.execute("BEGIN")
+        cursor = conn.execute("""
+            INSERT INTO main.terms
+                (id, category_id, parent_term_id, name, definition, hierarchy_level, order_num, content_hash, source)
+            SELECT id + ?1, category_id, parent_term_id + ?1, name, definition, hierarchy_level, order_num,
+                   content_hash, source
+            FROM section.terms ORDER BY id
+        """, (offset,))
+        merged = cursor.rowcount
+        conn.execute("""
+            INSERT INTO main.answers (term_id, question_id, answer_text, content_hash)
+            SELECT term_id + ?, question_id, answer_text, content_hash FROM section.answers ORDER BY id
+        """, (offset,))
+        conn.execute("""
+            INSERT INTO main.examples (term_id, example_text)
+            SELECT term_id + ?, example_text FROM section.examples ORDER BY id
+        """, (offset,))
+        conn.execute("""
+            INSERT INTO main.term_relationships (term_id, related_term_id, relationship_type)
+            SELECT term_id + ?1, related_term_id + ?1, relationship_type FROM section.term_relationships ORDER BY id
+        """, (offset,))
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.execute("DETACH DATABASE section")
+    return merged
+
+def parallel_build(db_path=DB_PATH, workers=None, groups=SECTION_GROUPS):
+    """Build db_path from scratch and atomically replace any existing file.
+
+    Returns a list of (group, build seconds, terms merged) in merge order.
+    """
+    conn = connect_writer(':memory:')
+    try:
+        create_schema(conn)
+        with contextlib.redirect_stdout(io.StringIO()), bulk_load(conn):
+            insert_questions(conn)
+            insert_categories(conn)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            section_paths = [os.path.join(tmp_dir, f"section_{i}.db") for i in range(len(groups))]
+            with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+                # map() yields in submission order, so each section is merged
+                # as soon as it and every section before it are built
+                builds = pool.map(build_section, groups, section_paths)
+
+                indexes = drop_secondary_indexes(conn)
+                triggers = suspend_sync_triggers(conn)
+                results = []
+                for group, (section_path, seconds) in zip(groups, builds):
+                    results.append((group, seconds, merge_section(conn, section_path)))
+                recreate_indexes(conn, indexes)
+                resume_sync_triggers(conn, triggers)
+                conn.commit()
+
+        optimize(conn)
+        publish(conn, db_path)
+    finally:
+        conn.close()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the course database with sections built in parallel")
+    parser.add_argument('--db', default=DB_PATH, help="database file to create (replaced if it exists)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="number of worker processes (default: number of CPU cores)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        results = parallel_build(args.db, args.workers)
+    except Exception as e:
+        print(f"Build failed: {type(e).__name__}: {e}")
+        sys.exit(1)
+    wall_time = time.perf_counter() - start
+
+    print("="*50)
+    print("PARALLEL BUILD")
+    print("="*50)
+    for group, seconds, merged in results:
+        names = ', '.join(function_name for _, function_name in group)
+        print(f"{seconds:>8.2f}s  {merged:>5} terms  {names}")
+    print(f"\nBuilt {sum(merged for _, _, merged in results)} terms into {args.db}")
+    print(f"Wall time: {wall_time:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -4,30 +4,12 @@ Populate Analysis Section (Category 4)
 This script adds all Analysis-related terms to the HCI database
 """
 
-import sqlite3
+from database import connect_writer
+from populate_common import bulk_load, insert_answer, insert_term, upserting
 
 def create_connection():
     """Create a database connection"""
-    return sqlite3.connect('hci_exam_review.db')
-
-def insert_term(conn, category_id, name, definition, parent_id=None, hierarchy_level=0, order_num=0):
-    """Insert a term and return its ID"""
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO terms (category_id, parent_term_id, name, definition, hierarchy_level, order_num)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (category_id, parent_id, name, definition, hierarchy_level, order_num))
-    conn.commit()
-    return cursor.lastrowid
-
-def insert_answer(conn, term_id, question_num, answer_text):
-    """Insert an answer for a specific term and question"""
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO answers (term_id, question_id, answer_text)
-        VALUES (?, ?, ?)
-    """, (term_id, question_num, answer_text))
-    conn.commit()
+    return connect_writer()
 
 def populate_analysis_section(conn):
     """Populate the Analysis category (Category 4)"""
@@ -432,8 +414,12 @@ def main():
     conn = create_connection()
 
     try:
-        populate_analysis_section(conn)
-        populate_design_informing_models(conn)
+        with bulk_load(conn), upserting(conn, 'populate_analysis') as changes:
+            populate_analysis_section(conn)
+            populate_design_informing_models(conn)
+
+        for line in changes.summary():
+            print(f"Upserted {line}")
 
         # Get total count
         cursor = conn.cursor()
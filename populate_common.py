@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+Shared Population Helpers
+Insert helpers used by all populate scripts, plus a bulk-loading mode that
+runs a whole build step in one transaction, buffers answers for executemany
+and rebuilds secondary indexes once the data is in, an upsert mode that
+makes re-running a populate script against an existing database idempotent,
+and a term registry that resolves parent terms by name without querying.
+"""
+
+import hashlib
+import sqlite3
+from contextlib import contextmanager
+
+from database import REBUILD_SQL
+
+# Answers buffered per connection while a bulk load is active
+_answer_buffers = {}
+
+# Existing rows' ids and content hashes per connection while upserting
+_upsert_states = {}
+
+# (category_id, name) -> term id per connection while a bulk load is active
+_term_registries = {}
+
+# Indexes the upsert mode and lookup_term rely on; kept in step with create_database.sql
+REQUIRED_INDEXES = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_questions_order ON questions(order_num)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_categories_name ON categories(name)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_terms_natural_key ON terms(category_id, ifnull(parent_term_id, 0), name)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_answers_term_question ON answers(term_id, question_id)",
+    "CREATE INDEX IF NOT EXISTS idx_terms_category_name ON terms(category_id, name)",
+    "CREATE INDEX IF NOT EXISTS idx_terms_name ON terms(name)",
+]
+
+def content_hash(*values):
+    """Return a short hash of a row's content columns"""
+    return hashlib.blake2b(repr(values).encode('utf-8'), digest_size=8).hexdigest()
+
+def term_hash(definition, hierarchy_level, order_num):
+    return content_hash(definition, hierarchy_level, order_num)
+
+def answer_hash(answer_text):
+    return content_hash(answer_text)
+
+def in_bulk_load(conn):
+    """Return True while conn is inside bulk_load()"""
+    return id(conn) in _answer_buffers
+
+def commit(conn):
+    """Commit unless a bulk load will commit everything at the end"""
+    if not in_bulk_load(conn):
+        conn.commit()
+
+class TermRegistry:
+    """Term ids by (category_id, name) for every term inserted during a bulk load.
+
+    Terms already in the database are loaded with one scan the first time a
+    lookup misses. Names used more than once in a category are remembered
+    as ambiguous, so looking them up fails instead of picking one.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.ambiguous = set()
+        self.loaded = False
+
+    def add(self, category_id, name, term_id):
+        key = (category_id, name)
+        if self.ids.setdefault(key, term_id) != term_id:
+            self.ambiguous.add(key)
+
+    def load(self, conn):
+        for term_id, category_id, name in conn.execute("SELECT id, category_id, name FROM terms"):
+            self.add(category_id, name, term_id)
+        self.loaded = True
+
+    def get(self, conn, category_id, name):
+        key = (category_id, name)
+        if key not in self.ids and not self.loaded:
+            self.load(conn)
+        if key in self.ambiguous:
+            raise ValueError(f"Term name {name!r} is used more than once in category {category_id}")
+        if key not in self.ids:
+            raise ValueError(f"No term named {name!r} in category {category_id}")
+        return self.ids[key]
+
+def lookup_term(conn, category_id, name):
+    """Return the ID of the term called name in category_id.
+
+    Inside bulk_load() this is a dictionary lookup; otherwise it uses the
+    terms(category_id, name) index. Raises ValueError if there is no such
+    term or the name is ambiguous.
+    """
+    registry = _term_registries.get(id(conn))
+    if registry is not None:
+        return registry.get(conn, category_id, name)
+
+    rows = conn.execute("SELECT id FROM terms WHERE category_id = ? AND name = ? LIMIT 2",
+                        (category_id, name)).fetchall()
+    if len(rows) > 1:
+        raise ValueError(f"Term name {name!r} is used more than once in category {category_id}")
+    if not rows:
+        raise ValueError(f"No term named {name!r} in category {category_id}")
+    return rows[0][0]
+
+def insert_term(conn, category_id, name, definition, parent_id=None, hierarchy_level=0, order_num=0):
+    """Insert a term and return its ID.
+
+    While upserting, a term with the same category, parent and name keeps
+    its ID and is only rewritten if its content changed.
+    """
+    term_id = _insert_term(conn, category_id, name, definition, parent_id, hierarchy_level, order_num)
+    registry = _term_registries.get(id(conn))
+    if registry is not None:
+        registry.add(category_id, name, term_id)
+    return term_id
+
+def _insert_term(conn, category_id, name, definition, parent_id, hierarchy_level, order_num):
+    digest = term_hash(definition, hierarchy_level, order_num)
+    state = _upsert_states.get(id(conn))
+    key = (category_id, parent_id, name)
+    source = state.source if state is not None else None
+    if state is not None and key in state.terms:
+        term_id, old_digest, old_source = state.terms[key]
+        state.seen_terms.add(term_id)
+        if old_digest == digest and old_source == source:
+            state.count('terms', 'unchanged')
+            return term_id
+        # Terms written before sources were recorded get theirs on the next run
+        conn.execute("""
+            UPDATE terms SET definition = ?, hierarchy_level = ?, order_num = ?, content_hash = ?, source = ?
+            WHERE id = ?
+        """, (definition, hierarchy_level, order_num, digest, source, term_id))
+        state.terms[key] = (term_id, digest, source)
+        state.count('terms', 'updated' if old_digest != digest else 'unchanged')
+        commit(conn)
+        return term_id
+
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO terms
+            (category_id, parent_term_id, name, definition, hierarchy_level, order_num, content_hash, source)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, (category_id, parent_id, name, definition, hierarchy_level, order_num, digest, source))
+    if state is not None:
+        state.terms[key] = (cursor.lastrowid, digest, source)
+        state.seen_terms.add(cursor.lastrowid)
+        state.count('terms', 'inserted')
+    commit(conn)
+    return cursor.lastrowid
+
+def insert_answer(conn, term_id, question_num, answer_text):
+    """Insert an answer for a specific term and question"""
+    digest = answer_hash(answer_text)
+    state = _upsert_states.get(id(conn))
+    if state is not None:
+        state.seen_answers.add((term_id, question_num))
+        old_digest = state.answers.get((term_id, question_num))
+        if old_digest == digest:
+            state.count('answers', 'unchanged')
+            return
+        state.answers[(term_id, question_num)] = digest
+        if old_digest is not None:
+            flush_answers(conn)
+            conn.execute("""
+                UPDATE answers SET answer_text = ?, content_hash = ?
+                WHERE term_id = ? AND question_id = ?
+            """, (answer_text, digest, term_id, question_num))
+            state.count('answers', 'updated')
+            commit(conn)
+            return
+        state.count('answers', 'inserted')
+
+    if in_bulk_load(conn):
+        _answer_buffers[id(conn)].append((term_id, question_num, answer_text, digest))
+        return
+    conn.execute("""
+        INSERT INTO answers (term_id, question_id, answer_text, content_hash)
+        VALUES (?, ?, ?, ?)
+    """, (term_id, question_num, answer_text, digest))
+    conn.commit()
+
+def insert_example(conn, term_id, example_text):
+    """Insert an example for a term"""
+    state = _upsert_states.get(id(conn))
+    if state is not None:
+        state.seen_examples.add((term_id, example_text))
+        if (term_id, example_text) in state.examples:
+            return
+        state.examples.add((term_id, example_text))
+    conn.execute("""
+        INSERT INTO examples (term_id, example_text)
+        VALUES (?, ?)
+    """, (term_id, example_text))
+    commit(conn)
+
+# Relationship types inferred from the hierarchy rather than inserted
+INFERRED_RELATIONSHIPS = ('parent', 'sibling')
+
+def insert_relationship(conn, term_id, related_term_id, relationship_type):
+    """Record an explicit relationship between two terms, e.g. 'compare_with'.
+
+    Parent and sibling relationships are inferred from the hierarchy and
+    shouldn't be inserted by hand.
+    """
+    state = _upsert_states.get(id(conn))
+    if state is not None:
+        state.seen_relationships.add((term_id, related_term_id, relationship_type))
+        if (term_id, related_term_id, relationship_type) in state.relationships:
+            return
+        state.relationships.add((term_id, related_term_id, relationship_type))
+    conn.execute("""
+        INSERT INTO term_relationships (term_id, related_term_id, relationship_type)
+        VALUES (?, ?, ?)
+    """, (term_id, related_term_id, relationship_type))
+    commit(conn)
+
+def flush_answers(conn):
+    """Write buffered answers with a single executemany"""
+    buffer = _answer_buffers.get(id(conn))
+    if buffer:
+        conn.executemany("""
+            INSERT INTO answers (term_id, question_id, answer_text, content_hash)
+            VALUES (?, ?, ?, ?)
+        """, buffer)
+        buffer.clear()
+
+def drop_secondary_indexes(conn):
+    """Drop every non-unique index and return (name, sql) pairs for recreate_indexes()"""
+    indexes = conn.execute("""
+        SELECT name, sql FROM sqlite_master
+        WHERE type = 'index' AND sql IS NOT NULL AND sql NOT LIKE 'CREATE UNIQUE%'
+    """).fetchall()
+    for name, _ in indexes:
+        conn.execute(f'DROP INDEX "{name}"')
+    return indexes
+
+def recreate_indexes(conn, indexes):
+    """Recreate dropped indexes, skipping any created again in the meantime"""
+    existing = {name for name, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    for name, sql in indexes:
+        if name not in existing:
+            conn.execute(sql)
+
+def suspend_sync_triggers(conn):
+    """Drop the triggers that keep the derived tables in sync and return them for resume_sync_triggers().
+
+    Each trigger rewrites a term's whole search or detail row, its
+    hierarchy rows or its inferred relationships, which is far slower than
+    rebuilding the tables once after a bulk load.
+    """
+    conditions = ' OR '.join(f"sql LIKE '%{table}%'" for table in REBUILD_SQL)
+    triggers = conn.execute(f"""
+        SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND ({conditions})
+    """).fetchall()
+    for name, _ in triggers:
+        conn.execute(f'DROP TRIGGER "{name}"')
+    return triggers
+
+def resume_sync_triggers(conn, triggers, since_id=0):
+    """Recreate the sync triggers after refilling the derived tables they maintain.
+
+    Only rows for terms with an id above since_id are rebuilt, so a load
+    that appended terms doesn't redo the rest; since_id None skips the
+    rebuild.
+    """
+    if not triggers:
+        return
+    if since_id is not None:
+        for table, statements in REBUILD_SQL.items():
+            if any(table in trigger_sql for _, trigger_sql in triggers):
+                for sql in statements:
+                    conn.execute(sql, {'since_id': since_id})
+    for _, sql in triggers:
+        conn.execute(sql)
+
+def is_empty(conn):
+    """Return True if conn's database has no terms yet"""
+    return conn.execute("SELECT 1 FROM terms LIMIT 1").fetchone() is None
+
+@contextmanager
+def bulk_load(conn, rebuild=None):
+    """Run the enclosed inserts as one transaction.
+
+    With rebuild, non-unique indexes are dropped up front and recreated
+    after the data is loaded; unique indexes stay so lookups and
+    constraints keep working. The derived tables (full-text search, term
+    details, hierarchy and inferred relationships) are filled in once at
+    the end instead of row by row, and only if anything changed. Only the
+    terms added during the load are filled in, so rebuild suits loads that
+    append terms, not ones that edit existing terms.
+
+    By default that only happens when the database has no terms yet. An
+    upsert into an existing database keeps its indexes and sync triggers
+    live, so a run that changes nothing writes nothing and an edit only
+    touches the rows it changes. Everything, including the index changes,
+    is rolled back on error.
+    """
+    if in_bulk_load(conn):
+        yield conn
+        return
+
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN")
+    if rebuild is None:
+        rebuild = is_empty(conn)
+    indexes = drop_secondary_indexes(conn) if rebuild else []
+    triggers = suspend_sync_triggers(conn) if rebuild else []
+    changes = conn.total_changes
+    last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM terms").fetchone()[0]
+
+    _answer_buffers[id(conn)] = []
+    _term_registries[id(conn)] = TermRegistry()
+    try:
+        yield conn
+        flush_answers(conn)
+        recreate_indexes(conn, indexes)
+        resume_sync_triggers(conn, triggers, last_id if conn.total_changes != changes else None)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        del _answer_buffers[id(conn)]
+        del _term_registries[id(conn)]
+
+def ensure_natural_keys(conn):
+    """Bring an older database up to the schema the upsert mode needs.
+
+    Adds the content_hash and source columns and lookup indexes if missing
+    and fills in hashes for rows written without one.
+    """
+    for table, column in (('terms', 'content_hash'), ('answers', 'content_hash'), ('terms', 'source')):
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if column not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} TEXT")
+    for sql in REQUIRED_INDEXES:
+        try:
+            conn.execute(sql)
+        except sqlite3.IntegrityError:
+            raise ValueError(f"Database already contains duplicate rows ({sql.split(' ON ')[1]}); "
+                             "rebuild it from create_database.sql") from None
+
+    conn.executemany("UPDATE terms SET content_hash = ? WHERE id = ?", [
+        (term_hash(definition, level, order), term_id) for term_id, definition, level, order in conn.execute(
+            "SELECT id, definition, hierarchy_level, order_num FROM terms WHERE content_hash IS NULL")
+    ])
+    conn.executemany("UPDATE answers SET content_hash = ? WHERE id = ?", [
+        (answer_hash(text), answer_id) for answer_id, text in conn.execute(
+            "SELECT id, answer_text FROM answers WHERE content_hash IS NULL")
+    ])
+
+class UpsertState:
+    """Natural key -> (id, content hash) maps for rows already in the database.
+
+    Also records the keys of every row the run produces, so rows its
+    source produced before but no longer does can be pruned.
+    """
+
+    def __init__(self, conn, source=None):
+        self.source = source
+        self.terms = {
+            (category_id, parent_id, name): (term_id, digest, term_source)
+            for term_id, category_id, parent_id, name, digest, term_source in conn.execute(
+                "SELECT id, category_id, parent_term_id, name, content_hash, source FROM terms")
+        }
+        self.answers = {
+            (term_id, question_id): digest
+            for term_id, question_id, digest in conn.execute(
+                "SELECT term_id, question_id, content_hash FROM answers")
+        }
+        self.examples = set(conn.execute("SELECT term_id, example_text FROM examples"))
+        self.relationships = set(conn.execute(
+            "SELECT term_id, related_term_id, relationship_type FROM term_relationships"))
+        self.seen_terms = set()
+        self.seen_answers = set()
+        self.seen_examples = set()
+        self.seen_relationships = set()
+        self.counts = {}
+
+    def count(self, table, outcome, n=1):
+        self.counts.setdefault(table, {'inserted': 0, 'updated': 0, 'unchanged': 0, 'removed': 0})[outcome] += n
+
+    def summary(self):
+        """Return lines like 'terms: 3 inserted, 1 updated, 145 unchanged'"""
+        return [f"{table}: " + ', '.join(f"{n} {outcome}" for outcome, n in counts.items())
+                for table, counts in self.counts.items()]
+
+def prune_stale_rows(conn, state):
+    """Delete the rows state.source produced on an earlier run but not on this one.
+
+    A renamed or moved term gets a new natural key and so a new row; the
+    old row, with its answers, examples and relationships, is removed here.
+    So are answers, examples and explicit relationships dropped from terms
+    the run still produces. Terms written by other sources, or before
+    sources were recorded, are never touched.
+    """
+    flush_answers(conn)
+    stale_terms = [(term_id,) for term_id, in conn.execute("SELECT id FROM terms WHERE source = ?", (state.source,))
+                   if term_id not in state.seen_terms]
+    stale_answers = [key for key in state.answers
+                     if key[0] in state.seen_terms and key not in state.seen_answers]
+    stale_examples = [key for key in state.examples
+                      if key[0] in state.seen_terms and key not in state.seen_examples]
+    stale_relationships = [key for key in state.relationships
+                           if key[0] in state.seen_terms and key[2] not in INFERRED_RELATIONSHIPS
+                           and key not in state.seen_relationships]
+
+    conn.executemany("DELETE FROM answers WHERE term_id = ?", stale_terms)
+    conn.executemany("DELETE FROM examples WHERE term_id = ?", stale_terms)
+    conn.executemany("DELETE FROM term_relationships WHERE term_id = ?1 OR related_term_id = ?1", stale_terms)
+    conn.executemany("DELETE FROM terms WHERE id = ?", stale_terms)
+    conn.executemany("DELETE FROM answers WHERE term_id = ? AND question_id = ?", stale_answers)
+    conn.executemany("DELETE FROM examples WHERE term_id = ? AND example_text = ?", stale_examples)
+    conn.executemany("""
+        DELETE FROM term_relationships WHERE term_id = ? AND related_term_id = ? AND relationship_type = ?
+    """, stale_relationships)
+    for table, rows in (('terms', stale_terms), ('answers', stale_answers), ('examples', stale_examples),
+                        ('term_relationships', stale_relationships)):
+        if rows:
+            state.count(table, 'removed', len(rows))
+
+@contextmanager
+def upserting(conn, source=None):
+    """Make the enclosed insert_* calls idempotent.
+
+    Terms are matched on (category, parent, name) and answers on (term,
+    question); rows whose content hash is unchanged are skipped and changed
+    rows are updated in place, so IDs stay stable. Terms are tagged with
+    source, normally the populate script's name; when the run completes,
+    rows that source produced before but no longer does are pruned. Use
+    inside bulk_load() so the whole run is one transaction. Yields the
+    UpsertState, whose summary() reports what changed.
+    """
+    ensure_natural_keys(conn)
+    state = _upsert_states[id(conn)] = UpsertState(conn, source)
+    try:
+        yield state
+        if source is not None:
+            prune_stale_rows(conn, state)
+    finally:
+        del _upsert_states[id(conn)]
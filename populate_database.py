@@ -4,12 +4,14 @@ Populate HCI Exam Review Database
 This script populates the SQLite database with all HCI terms, definitions, and answers.
 """
 
-import sqlite3
 import json
 
+from database import connect_writer
+from populate_common import bulk_load, commit, insert_answer, insert_relationship, insert_term, lookup_term, upserting
+
 def create_connection():
     """Create a database connection"""
-    return sqlite3.connect('hci_exam_review.db')
+    return connect_writer()
 
 def insert_questions(conn):
     """Insert the standard questions to consider for each term"""
@@ -23,12 +25,17 @@ def insert_questions(conn):
         (7, "How is it similar to or different than related terms?")
     ]
 
+    # Only write rows that differ, so re-running an unchanged script writes nothing
+    existing = set(conn.execute("SELECT order_num, question_text FROM questions"))
     cursor = conn.cursor()
     cursor.executemany(
-        "INSERT INTO questions (order_num, question_text) VALUES (?, ?)",
-        questions
+        """
+        INSERT INTO questions (order_num, question_text) VALUES (?, ?)
+        ON CONFLICT (order_num) DO UPDATE SET question_text = excluded.question_text
+        """,
+        [question for question in questions if question not in existing]
     )
-    conn.commit()
+    commit(conn)
     print(f"Inserted {len(questions)} questions")
 
 def insert_categories(conn):
@@ -43,42 +50,18 @@ def insert_categories(conn):
         (7, "Evaluation", "Methods for assessing and validating UX designs")
     ]
 
+    existing = set(conn.execute("SELECT order_num, name, description FROM categories"))
     cursor = conn.cursor()
     cursor.executemany(
-        "INSERT INTO categories (order_num, name, description) VALUES (?, ?, ?)",
-        categories
+        """
+        INSERT INTO categories (order_num, name, description) VALUES (?, ?, ?)
+        ON CONFLICT (name) DO UPDATE SET order_num = excluded.order_num, description = excluded.description
+        """,
+        [category for category in categories if category not in existing]
     )
-    conn.commit()
+    commit(conn)
     print(f"Inserted {len(categories)} categories")
 
-def insert_term(conn, category_id, name, definition, parent_id=None, hierarchy_level=0, order_num=0):
-    """Insert a term and return its ID"""
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO terms (category_id, parent_term_id, name, definition, hierarchy_level, order_num)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (category_id, parent_id, name, definition, hierarchy_level, order_num))
-    conn.commit()
-    return cursor.lastrowid
-
-def insert_answer(conn, term_id, question_num, answer_text):
-    """Insert an answer for a specific term and question"""
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO answers (term_id, question_id, answer_text)
-        VALUES (?, ?, ?)
-    """, (term_id, question_num, answer_text))
-    conn.commit()
-
-def insert_example(conn, term_id, example_text):
-    """Insert an example for a term"""
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO examples (term_id, example_text)
-        VALUES (?, ?)
-    """, (term_id, example_text))
-    conn.commit()
-
 def populate_general_section(conn):
     """Populate the General category (Category 1)"""
     print("Populating General section...")
@@ -192,6 +175,22 @@ def populate_general_section(conn):
     insert_answer(conn, term_id, 6, "Good interaction design is: responsive and provides immediate feedback, follows user expectations and mental models, is consistent within the system, supports user control, prevents errors, and creates smooth, natural-feeling interactions.")
     insert_answer(conn, term_id, 7, "Interaction design is more behavioral/temporal than UI design (which is visual/spatial). It's more specific than UX (which is holistic) and more detailed than conceptual design (which is high-level). It focuses on the dynamic aspects of the interface.")
 
+    # Terms students are asked to tell apart
+    comparisons = [
+        ("User Experience (UX)", "User Interface (UI)"),
+        ("User Experience (UX)", "Human-Computer Interaction (HCI)"),
+        ("User Interface (UI)", "Human-Computer Interaction (HCI)"),
+        ("User Interface (UI)", "Interaction Design"),
+        ("Usability", "Usefulness"),
+        ("Usability", "User Experience (UX)"),
+        ("Usefulness", "User Experience (UX)"),
+        ("Emotional Impact", "Usability"),
+        ("Emotional Impact", "Usefulness"),
+    ]
+    for name, related_name in comparisons:
+        insert_relationship(conn, lookup_term(conn, category_id, name),
+                            lookup_term(conn, category_id, related_name), "compare_with")
+
     print(f"  Inserted {9} terms for General section")
 
 def populate_ux_in_se_section(conn):
@@ -348,14 +347,19 @@ def main():
     conn = create_connection()
 
     try:
-        # Insert foundation data
-        insert_questions(conn)
-        insert_categories(conn)
-
-        # Populate each section
-        populate_general_section(conn)
-        populate_ux_in_se_section(conn)
-        populate_overall_ux_process(conn)
+        # Load everything in one transaction
+        with bulk_load(conn), upserting(conn, 'populate_database') as changes:
+            # Insert foundation data
+            insert_questions(conn)
+            insert_categories(conn)
+
+            # Populate each section
+            populate_general_section(conn)
+            populate_ux_in_se_section(conn)
+            populate_overall_ux_process(conn)
+
+        for line in changes.summary():
+            print(f"Upserted {line}")
 
         # Get count of terms
         cursor = conn.cursor()
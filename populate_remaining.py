@@ -7,27 +7,11 @@ This script completes the database by adding all remaining terms from:
 - Evaluation section
 """
 
-import sqlite3
+from database import connect_writer
+from populate_common import bulk_load, insert_answer, insert_relationship, insert_term, lookup_term, upserting
 
 def create_connection():
-    return sqlite3.connect('hci_exam_review.db')
-
-def insert_term(conn, category_id, name, definition, parent_id=None, hierarchy_level=0, order_num=0):
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO terms (category_id, parent_term_id, name, definition, hierarchy_level, order_num)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (category_id, parent_id, name, definition, hierarchy_level, order_num))
-    conn.commit()
-    return cursor.lastrowid
-
-def insert_answer(conn, term_id, question_num, answer_text):
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO answers (term_id, question_id, answer_text)
-        VALUES (?, ?, ?)
-    """, (term_id, question_num, answer_text))
-    conn.commit()
+    return connect_writer()
 
 # Due to length constraints, I'll create a condensed version that covers all remaining terms
 # with comprehensive but concise answers
@@ -38,9 +22,7 @@ def populate_remaining_design(conn):
     category_id = 5
 
     # Get Design Thinking parent
-    cursor = conn.cursor()
-    cursor.execute("SELECT id FROM terms WHERE name = 'Design Thinking' AND category_id = 5")
-    dt_parent = cursor.fetchone()[0]
+    dt_parent = lookup_term(conn, category_id, "Design Thinking")
 
     # Designing with Personas
     dwp_id = insert_term(conn, category_id, "Designing with Personas",
@@ -205,6 +187,23 @@ def populate_evaluation(conn):
         insert_answer(conn, tid, 2, f"{name} helps assess design quality and identify improvements.")
         insert_answer(conn, tid, 3, "Applied during Evaluation phase to validate and improve designs.")
 
+    # Methods on either side of the evaluation tradeoffs
+    related = [
+        ("Analytic vs. Empirical", "Design Walkthrough"),
+        ("Analytic vs. Empirical", "Usability Inspection"),
+        ("Analytic vs. Empirical", "Heuristic Evaluation"),
+        ("Rapid vs. Rigorous", "RITE (Rapid Iterative Testing and Evaluation)"),
+        ("Rapid vs. Rigorous", "'Discount' Evaluation"),
+        ("Rapid vs. Rigorous", "Rigorous Lab-Based Evaluation"),
+        ("Rapid vs. Rigorous", "Quasi-Empirical UX Evaluation"),
+        ("Subjective vs. Objective Data", "Questionnaires"),
+    ]
+    for name, related_name in related:
+        insert_relationship(conn, lookup_term(conn, category_id, name),
+                            lookup_term(conn, category_id, related_name), "related")
+    insert_relationship(conn, lookup_term(conn, category_id, "Rigorous Lab-Based Evaluation"),
+                        lookup_term(conn, category_id, "Quasi-Empirical UX Evaluation"), "compare_with")
+
     print(f"  Inserted {len(eval_terms)} evaluation terms")
 
 def populate_design_guidelines(conn):
@@ -337,11 +336,15 @@ def main():
     conn = create_connection()
 
     try:
-        populate_remaining_design(conn)
-        populate_design_production(conn)
-        populate_design_guidelines(conn)
-        populate_prototyping(conn)
-        populate_evaluation(conn)
+        with bulk_load(conn), upserting(conn, 'populate_remaining') as changes:
+            populate_remaining_design(conn)
+            populate_design_production(conn)
+            populate_design_guidelines(conn)
+            populate_prototyping(conn)
+            populate_evaluation(conn)
+
+        for line in changes.summary():
+            print(f"Upserted {line}")
 
         # Final counts
         cursor = conn.cursor()
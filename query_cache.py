@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Query Result Cache
+A bounded LRU cache of query results for the study tool, so navigating back
+to a category, the heuristics list or a term's details is served from
+memory instead of running the same queries again.
+
+Every lookup first checks PRAGMA data_version; when another connection
+(say a populate run) has committed since the results were cached, the whole
+cache is dropped, so stale content is never returned. A database published
+over the open file is caught by the owner's reopen_if_replaced(), which
+rebinds the cache to the new connection.
+"""
+
+import functools
+from collections import OrderedDict, namedtuple
+
+# Most results kept before the least recently used are evicted
+CACHE_SIZE = 256
+
+CacheInfo = namedtuple('CacheInfo', 'hits misses size maxsize')
+
+class QueryCache:
+    """LRU map of (query label, arguments) -> result for one connection"""
+
+    def __init__(self, conn, maxsize=CACHE_SIZE):
+        self.conn = conn
+        self.maxsize = maxsize
+        self.results = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.data_version = None
+
+    def get(self, key, compute):
+        """Return the cached result for key, calling compute() to fill it on a miss.
+
+        Callers must not modify the result, since later hits share it.
+        """
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self.data_version:
+            self.results.clear()
+            self.data_version = data_version
+        if key in self.results:
+            self.hits += 1
+            self.results.move_to_end(key)
+            return self.results[key]
+
+        self.misses += 1
+        result = compute()
+        if self.maxsize > 0:
+            self.results[key] = result
+            if len(self.results) > self.maxsize:
+                self.results.popitem(last=False)
+        return result
+
+    def clear(self):
+        """Drop every cached result and reset the counters"""
+        self.results.clear()
+        self.hits = self.misses = 0
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, len(self.results), self.maxsize)
+
+def cached(method):
+    """Serve method's results from self.cache, keyed by its name and arguments.
+
+    self.reopen_if_replaced() runs first, so a replaced database file is
+    picked up before the cache is consulted.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args):
+        self.reopen_if_replaced()
+        return self.cache.get((method.__name__, *args), lambda: method(self, *args))
+    return wrapper
@@ -155,7 +155,7 @@ JOIN categories c ON t.category_id = c.id
 JOIN answers a ON t.id = a.term_id
 JOIN questions q ON a.question_id = q.id
 WHERE c.name = 'General'
-GROUP BY t.id
+GROUP BY t.order_num, t.id
 ORDER BY t.order_num;
 
 -- 16. Get complete term information (everything about one term)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Term Sampling
+Draws random terms for flashcards and quizzes from a cached array of term
+ids instead of ORDER BY RANDOM(), which scores and sorts every term on each
+draw. After the ids are loaded once, a sample of k terms costs O(k): pick k
+ids, then fetch those rows by primary key.
+
+Samples are without replacement and reproducible for a given seed. Besides
+uniform samples, a sample can be stratified across categories or weighted
+towards some categories.
+"""
+
+import bisect
+import itertools
+import random
+
+class TermSampler:
+    """Random samples of term ids, reloading the cached ids when the database changes"""
+
+    def __init__(self, conn, seed=None):
+        self.conn = conn
+        self.rng = random.Random(seed)
+        self.ids = []
+        self.by_category = {}
+        self.data_version = None
+
+    def refresh(self):
+        """Load every term id grouped by category, unless nothing has changed since the last load.
+
+        PRAGMA data_version changes whenever another connection commits, so
+        ids are never stale and an unchanged database is never rescanned.
+        """
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self.data_version:
+            return
+        self.ids = []
+        self.by_category = {}
+        for term_id, cat_id in self.conn.execute("SELECT id, category_id FROM terms ORDER BY id"):
+            self.ids.append(term_id)
+            self.by_category.setdefault(cat_id, []).append(term_id)
+        self.data_version = data_version
+
+    def sample(self, k):
+        """Return up to k distinct term ids chosen uniformly at random"""
+        self.refresh()
+        return self.rng.sample(self.ids, min(k, len(self.ids)))
+
+    def sample_stratified(self, k):
+        """Return up to k distinct term ids spread over the categories in proportion to their size.
+
+        Each category gets its proportional share rounded down; the terms
+        left over go to the categories with the largest remainders, so
+        small categories still show up in small samples.
+        """
+        self.refresh()
+        k = min(k, len(self.ids))
+        if not k:
+            return []
+        shares = {cat_id: k * len(ids) / len(self.ids) for cat_id, ids in self.by_category.items()}
+        counts = {cat_id: int(share) for cat_id, share in shares.items()}
+        leftover = k - sum(counts.values())
+        by_remainder = sorted(shares, key=lambda cat_id: (counts[cat_id] - shares[cat_id], self.rng.random()))
+        for cat_id in by_remainder[:leftover]:
+            counts[cat_id] += 1
+
+        sample = []
+        for cat_id, count in counts.items():
+            sample.extend(self.rng.sample(self.by_category[cat_id], count))
+        self.rng.shuffle(sample)
+        return sample
+
+    def sample_weighted(self, k, category_weights):
+        """Return k distinct term ids, picking categories in proportion to category_weights.
+
+        category_weights maps category id to a relative weight; categories
+        left out are never drawn. Each draw picks a category by its weight
+        times the terms it has left, then one of those terms uniformly, so a
+        category with weight 2 contributes about twice as many terms per
+        term it has as one with weight 1. Raises ValueError if the weighted
+        categories have fewer than k terms.
+        """
+        self.refresh()
+        remaining = {cat_id: len(self.by_category[cat_id]) for cat_id, weight in category_weights.items()
+                     if weight > 0 and self.by_category.get(cat_id)}
+        if k > sum(remaining.values()):
+            raise ValueError(f"Can't draw {k} distinct terms from the {sum(remaining.values())} "
+                             "in categories with a positive weight")
+
+        # A partial Fisher-Yates shuffle per category: the first drawn slots
+        # of its ids hold the terms drawn so far, with the swaps kept here
+        # rather than made in the shared lists
+        swaps = {cat_id: {} for cat_id in remaining}
+        sample = []
+        for _ in range(k):
+            categories = list(remaining)
+            cumulative = list(itertools.accumulate(
+                category_weights[cat_id] * remaining[cat_id] for cat_id in categories))
+            cat_id = categories[bisect.bisect(cumulative, self.rng.random() * cumulative[-1])]
+            ids, swapped = self.by_category[cat_id], swaps[cat_id]
+            drawn = len(ids) - remaining[cat_id]
+            pick = self.rng.randrange(drawn, len(ids))
+            sample.append(swapped.get(pick, ids[pick]))
+            swapped[pick] = swapped.get(drawn, ids[drawn])
+            remaining[cat_id] -= 1
+            if not remaining[cat_id]:
+                # Out of terms: drop it so it can't be picked again
+                del remaining[cat_id]
+        return sample
+
+    def fetch(self, term_ids):
+        """Return [(id, name, definition), ...] for term_ids, in the same order"""
+        if not term_ids:
+            return []
+        placeholders = ', '.join('?' * len(term_ids))
+        rows = {row[0]: row for row in self.conn.execute(
+            f"SELECT id, name, definition FROM terms WHERE id IN ({placeholders})", term_ids)}
+        return [rows[term_id] for term_id in term_ids if term_id in rows]
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Inverted Search Index
+Builds a tokenized, normalized keyword index over exported terms so clients
+can answer searches from postings lists instead of scanning every definition.
+"""
+
+import json
+import math
+import re
+import sys
+import unicodedata
+
+INDEX_VERSION = 1
+
+# Matches in a term's name count more than matches in its definition or answers
+FIELD_WEIGHTS = {'name': 5, 'definition': 2, 'answers': 1}
+
+STOPWORDS = frozenset("""
+    a an and are as at be but by can do does for from has have how if in into is it its
+    of on or so such that the their them then there these they this to was what when
+    where which while who why will with you your
+""".split())
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+def normalize(text):
+    """Lowercase text and strip accents"""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+def tokenize(text):
+    """Split text into normalized tokens, dropping stopwords and single characters"""
+    return [token for token in TOKEN_PATTERN.findall(normalize(text))
+            if len(token) > 1 and token not in STOPWORDS]
+
+def build_search_index(terms):
+    """Build an index from exported term objects.
+
+    Each posting is [term_id, score] where score is the field-weighted term
+    frequency. Postings are sorted by descending score. Term names are kept
+    so results can be shown without loading the full export.
+    """
+    scores = {}
+    names = {}
+    for term in terms:
+        names[term['id']] = term['name']
+        fields = {
+            'name': term['name'],
+            'definition': term['definition'],
+            'answers': ' '.join(term['answers'].values())
+        }
+        for field, text in fields.items():
+            weight = FIELD_WEIGHTS[field]
+            for token in tokenize(text):
+                postings = scores.setdefault(token, {})
+                postings[term['id']] = postings.get(term['id'], 0) + weight
+
+    return {
+        'version': INDEX_VERSION,
+        'fields': FIELD_WEIGHTS,
+        'docCount': len(names),
+        'names': names,
+        'postings': {
+            token: sorted(([term_id, score] for term_id, score in postings.items()),
+                          key=lambda posting: (-posting[1], posting[0]))
+            for token, postings in sorted(scores.items())
+        }
+    }
+
+def write_search_index(index, path):
+    """Write the index as compact JSON"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, separators=(',', ':'), ensure_ascii=False)
+
+def load_search_index(path):
+    """Load an index written by write_search_index"""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def search(index, query, limit=10):
+    """Return [(term_id, score), ...] for the best matches to a keyword query.
+
+    Each query token contributes its postings weighted by inverse document
+    frequency, so rare words dominate common ones.
+    """
+    doc_count = index['docCount']
+    totals = {}
+    for token in set(tokenize(query)):
+        postings = index['postings'].get(token)
+        if not postings:
+            continue
+        idf = math.log(1 + doc_count / len(postings))
+        for term_id, score in postings:
+            totals[term_id] = totals.get(term_id, 0.0) + score * idf
+
+    ranked = sorted(totals.items(), key=lambda item: (-item[1], item[0]))
+    return ranked[:limit]
+
+if __name__ == "__main__":
+    index_path = sys.argv[1] if len(sys.argv) > 1 else 'hci_data.search.json'
+    query = ' '.join(sys.argv[2:]) or input("Enter search term: ")
+    index = load_search_index(index_path)
+    for term_id, score in search(index, query):
+        print(f"{score:>8.2f}  {index['names'][str(term_id)]}")
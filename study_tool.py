@@ -4,18 +4,62 @@ HCI Exam Review - Interactive Study Tool
 A simple command-line tool for studying HCI concepts
 """
 
-import sqlite3
+import json
 import random
+import re
 import sys
 
+from database import DB_PATH, connect_readonly, file_identity, table_exists
+from fuzzy_search import TermNameIndex
+from hierarchy import get_ancestors, get_descendants, get_subtree_size
+from query_cache import CACHE_SIZE, QueryCache, cached
+from sampling import TermSampler
+from term_graph import TermGraph
+
+# Most results find_terms() returns; the best matches come first
+SEARCH_LIMIT = 50
+
+def fts_query(text):
+    """Turn free text into an FTS5 query matching every word as a prefix"""
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', text))
+
 class HCIStudyTool:
-    def __init__(self, db_path='hci_exam_review.db'):
-        self.conn = sqlite3.connect(db_path)
+    def __init__(self, db_path=DB_PATH, seed=None, cache_size=CACHE_SIZE):
+        self.db_path = db_path
+        self.file_identity = file_identity(db_path)
+        self.conn = connect_readonly(db_path)
+        self.cache = QueryCache(self.conn, cache_size)
+        self.sampler = TermSampler(self.conn, seed)
+        self.graph = TermGraph(self.conn)
+        self.name_index = TermNameIndex(self.conn)
         self.cursor = self.conn.cursor()
+        self.has_fts = table_exists(self.conn, 'terms_fts')
+        self.has_details = table_exists(self.conn, 'term_details')
 
     def close(self):
         self.conn.close()
 
+    def reopen_if_replaced(self):
+        """Reconnect if db_path is no longer the file the connection has open.
+
+        publish() renames a new database over the old one; the connection
+        keeps reading the old file and its PRAGMA data_version never moves,
+        so the file's identity is compared instead. The cache, sampler,
+        graph and name index are rebound and reload on their next use.
+        """
+        identity = file_identity(self.db_path)
+        if identity == self.file_identity:
+            return
+        self.conn.close()
+        self.file_identity = identity
+        self.conn = connect_readonly(self.db_path)
+        for component in (self.cache, self.sampler, self.graph, self.name_index):
+            component.conn = self.conn
+            component.data_version = None
+        self.cursor = self.conn.cursor()
+        self.has_fts = table_exists(self.conn, 'terms_fts')
+        self.has_details = table_exists(self.conn, 'term_details')
+
     def show_menu(self):
         print("\n" + "="*50)
         print("HCI EXAM REVIEW - STUDY TOOL")
@@ -30,10 +74,247 @@ class HCIStudyTool:
         print("8. Exit")
         print()
 
+    @cached
+    def get_categories(self):
+        """Return [(id, name), ...] in display order"""
+        self.cursor.execute("SELECT id, name FROM categories ORDER BY order_num")
+        return self.cursor.fetchall()
+
+    @cached
+    def get_category_terms(self, cat_id):
+        """Return [(name, definition), ...] for one category"""
+        self.cursor.execute("""
+            SELECT t.name, t.definition
+            FROM terms t
+            WHERE t.category_id = ?
+            ORDER BY t.order_num
+        """, (cat_id,))
+        return self.cursor.fetchall()
+
+    @cached
+    def find_terms(self, query, limit=SEARCH_LIMIT):
+        """Return up to limit [(name, definition, category, snippet), ...] best match first.
+
+        Searches names, definitions, answers and examples through terms_fts,
+        ranked by BM25 with the same field weights as the website's search
+        index. Every word matches as a prefix; snippet highlights the match
+        in [brackets]. Databases without terms_fts fall back to find_terms_like().
+        """
+        if not self.has_fts:
+            return self.find_terms_like(query)
+        match = fts_query(query)
+        if not match:
+            return []
+        self.cursor.execute("""
+            SELECT t.name, t.definition, c.name, snippet(terms_fts, -1, '[', ']', '...', 12)
+            FROM terms_fts
+            JOIN terms t ON t.id = terms_fts.rowid
+            JOIN categories c ON t.category_id = c.id
+            WHERE terms_fts MATCH ?
+            ORDER BY bm25(terms_fts, 5.0, 2.0, 1.0, 1.0)
+            LIMIT ?
+        """, (match, limit))
+        return self.cursor.fetchall()
+
+    def find_terms_like(self, query):
+        """Return [(name, definition, category, None), ...] whose name or definition contains query"""
+        self.cursor.execute("""
+            SELECT t.name, t.definition, c.name, NULL
+            FROM terms t
+            JOIN categories c ON t.category_id = c.id
+            WHERE t.name LIKE ? OR t.definition LIKE ?
+            ORDER BY t.name
+        """, (f'%{query}%', f'%{query}%'))
+        return self.cursor.fetchall()
+
+    @cached
+    def get_term_details(self, term_name):
+        """Return (name, definition, category, [(question, answer), ...]) or None.
+
+        Reads the term's precomputed term_details row; databases without
+        term_details fall back to get_term_details_joined().
+        """
+        if not self.has_details:
+            return self.get_term_details_joined(term_name)
+        self.cursor.execute("""
+            SELECT name, definition, category_name, answers
+            FROM term_details
+            WHERE name = ?
+        """, (term_name,))
+
+        result = self.cursor.fetchone()
+        if not result:
+            return None
+
+        *details, answers = result
+        return (*details, [(question, answer) for _, _, question, answer in json.loads(answers)])
+
+    def get_term_details_joined(self, term_name):
+        """get_term_details() by joining terms, answers and questions"""
+        self.cursor.execute("""
+            SELECT t.id, t.name, t.definition, c.name
+            FROM terms t
+            JOIN categories c ON t.category_id = c.id
+            WHERE t.name = ?
+        """, (term_name,))
+
+        result = self.cursor.fetchone()
+        if not result:
+            return None
+
+        term_id, *details = result
+        self.cursor.execute("""
+            SELECT q.question_text, a.answer_text
+            FROM answers a
+            JOIN questions q ON a.question_id = q.id
+            WHERE a.term_id = ?
+            ORDER BY q.order_num
+        """, (term_id,))
+        return (*details, self.cursor.fetchall())
+
+    @cached
+    def get_term_id(self, term_name):
+        """Return the id of the term called term_name, or None"""
+        self.cursor.execute("SELECT id FROM terms WHERE name = ?", (term_name,))
+        result = self.cursor.fetchone()
+        return result[0] if result else None
+
+    @cached
+    def find_similar_terms(self, query, limit=10):
+        """Return up to limit [(id, name, similarity), ...] for term names spelled like query"""
+        matches = self.name_index.search(query, limit)
+        names = self.get_term_names([term_id for term_id, _ in matches])
+        return [(term_id, names[term_id], similarity) for term_id, similarity in matches]
+
+    def resolve_term(self, text):
+        """Return (id, name) of the term called text, else of the closest spelled one, or None"""
+        term_id = self.get_term_id(text)
+        if term_id is not None:
+            return term_id, text
+        similar = self.find_similar_terms(text, 1)
+        return similar[0][:2] if similar else None
+
+    @cached
+    def get_descendants(self, term_id, max_depth=None):
+        """Return [(id, name, depth), ...] for every term below term_id, shallowest first"""
+        return get_descendants(self.conn, term_id, max_depth)
+
+    @cached
+    def get_breadcrumb(self, term_id):
+        """Return the names of the terms above term_id, root first"""
+        return [name for _, name, _ in get_ancestors(self.conn, term_id)]
+
+    @cached
+    def get_subtree_size(self, term_id):
+        """Return the number of terms in term_id's subtree, counting the term itself"""
+        return get_subtree_size(self.conn, term_id)
+
+    def get_term_names(self, term_ids):
+        """Return {id: name} for term_ids"""
+        if not term_ids:
+            return {}
+        placeholders = ', '.join('?' * len(term_ids))
+        self.cursor.execute(f"SELECT id, name FROM terms WHERE id IN ({placeholders})", list(term_ids))
+        return dict(self.cursor.fetchall())
+
+    @cached
+    def get_related_terms(self, term_id, limit=5):
+        """Return up to limit [(id, name, how it's related), ...] nearest related terms first.
+
+        Directly related terms are described by their relationship, others
+        by the directly related term they are reached through.
+        """
+        related = self.graph.nearest_related(term_id, limit)
+        names = self.get_term_names({related_id for related_id, _, _, _ in related} |
+                                    {first_hop for _, _, first_hop, _ in related})
+        return [(related_id, names[related_id],
+                 relationship if related_id == first_hop else f"via {names[first_hop]}")
+                for related_id, _, first_hop, relationship in related]
+
+    def get_neighbourhood(self, term_id, hops=2):
+        """Return [(id, name, hops away), ...] for the terms within hops relationships, nearest first"""
+        self.reopen_if_replaced()
+        distances = self.graph.neighbours(term_id, hops)
+        names = self.get_term_names(distances)
+        return sorted(((related_id, names[related_id], n) for related_id, n in distances.items()),
+                      key=lambda row: (row[2], row[1]))
+
+    def get_connection(self, term_id, other_id):
+        """Return the names along the shortest chain of relationships between two terms, or None"""
+        self.reopen_if_replaced()
+        path = self.graph.shortest_path(term_id, other_id)
+        if path is None:
+            return None
+        names = self.get_term_names(path)
+        return [names[node] for node in path]
+
+    def get_random_terms(self, limit, stratified=False, category_weights=None):
+        """Return [(id, name, definition), ...] for limit distinct random terms.
+
+        stratified spreads the terms over the categories in proportion to
+        their size; category_weights ({category id: weight}) favours some
+        categories over others. Draws are reproducible for the seed the
+        tool was created with.
+        """
+        self.reopen_if_replaced()
+        if category_weights:
+            term_ids = self.sampler.sample_weighted(limit, category_weights)
+        elif stratified:
+            term_ids = self.sampler.sample_stratified(limit)
+        else:
+            term_ids = self.sampler.sample(limit)
+        return self.sampler.fetch(term_ids)
+
+    @cached
+    def get_key_answers(self, term_id):
+        """Return the 'why' and 'when' answers for a term"""
+        if not self.has_details:
+            return self.get_key_answers_joined(term_id)
+        self.cursor.execute("SELECT answers FROM term_details WHERE term_id = ?", (term_id,))
+        result = self.cursor.fetchone()
+        if not result:
+            return []
+        return [(question, answer) for _, order, question, answer in json.loads(result[0]) if order in (2, 3)]
+
+    def get_key_answers_joined(self, term_id):
+        """get_key_answers() by joining answers and questions"""
+        self.cursor.execute("""
+            SELECT q.question_text, a.answer_text
+            FROM answers a
+            JOIN questions q ON a.question_id = q.id
+            WHERE a.term_id = ? AND q.order_num IN (2, 3)
+            ORDER BY q.order_num
+        """, (term_id,))
+        return self.cursor.fetchall()
+
+    @cached
+    def get_nielsens_heuristics(self):
+        """Return [(name, definition), ...] for Nielsen's heuristics"""
+        self.cursor.execute("""
+            SELECT t.name, t.definition
+            FROM terms t
+            WHERE t.parent_term_id = (
+                SELECT id FROM terms WHERE name = "Nielsen's Original Heuristics"
+            )
+            ORDER BY t.order_num
+        """)
+        return self.cursor.fetchall()
+
+    @cached
+    def get_category_summaries(self):
+        """Return [(name, description, term_count), ...] in display order"""
+        self.cursor.execute("""
+            SELECT c.name, c.description, COUNT(t.id)
+            FROM categories c
+            LEFT JOIN terms t ON c.id = t.category_id
+            GROUP BY c.id
+            ORDER BY c.order_num
+        """)
+        return self.cursor.fetchall()
+
     def browse_by_category(self):
         print("\nCategories:")
-        self.cursor.execute("SELECT id, name FROM categories ORDER BY order_num")
-        categories = self.cursor.fetchall()
+        categories = self.get_categories()
 
         for i, (cat_id, name) in enumerate(categories, 1):
             print(f"{i}. {name}")
@@ -47,14 +328,7 @@ class HCIStudyTool:
             print("Invalid choice")
 
     def show_category_terms(self, cat_id):
-        self.cursor.execute("""
-            SELECT t.name, t.definition
-            FROM terms t
-            WHERE t.category_id = ?
-            ORDER BY t.order_num
-        """, (cat_id,))
-
-        terms = self.cursor.fetchall()
+        terms = self.get_category_terms(cat_id)
         print(f"\nFound {len(terms)} terms:")
 
         for i, (name, definition) in enumerate(terms, 1):
@@ -74,24 +348,30 @@ class HCIStudyTool:
     def search_term(self):
         query = input("\nEnter search term: ").strip()
 
-        self.cursor.execute("""
-            SELECT t.name, t.definition, c.name
-            FROM terms t
-            JOIN categories c ON t.category_id = c.id
-            WHERE t.name LIKE ? OR t.definition LIKE ?
-            ORDER BY t.name
-        """, (f'%{query}%', f'%{query}%'))
-
-        results = self.cursor.fetchall()
+        results = self.find_terms(query)
 
         if not results:
-            print("No terms found.")
+            similar = self.find_similar_terms(query, 5)
+            if not similar:
+                print("No terms found.")
+                return
+            print("\nNo terms found. Did you mean:")
+            for i, (_, name, _) in enumerate(similar, 1):
+                print(f"{i}. {name}")
+            choice = input("\nEnter number for details (or Enter to skip): ").strip()
+            if choice.isdigit():
+                idx = int(choice) - 1
+                if 0 <= idx < len(similar):
+                    self.show_term_details(similar[idx][1])
             return
 
         print(f"\nFound {len(results)} term(s):")
-        for i, (name, definition, category) in enumerate(results, 1):
+        for i, (name, definition, category, snippet) in enumerate(results, 1):
             print(f"\n{i}. {name} ({category})")
-            print(f"   {definition[:100]}..." if len(definition) > 100 else f"   {definition}")
+            if snippet:
+                print(f"   {snippet}")
+            else:
+                print(f"   {definition[:100]}..." if len(definition) > 100 else f"   {definition}")
 
         if len(results) == 1:
             self.show_term_details(results[0][0])
@@ -103,37 +383,28 @@ class HCIStudyTool:
                     self.show_term_details(results[idx][0])
 
     def show_term_details(self, term_name):
-        # Get term info
-        self.cursor.execute("""
-            SELECT t.name, t.definition, c.name
-            FROM terms t
-            JOIN categories c ON t.category_id = c.id
-            WHERE t.name = ?
-        """, (term_name,))
-
-        result = self.cursor.fetchone()
+        result = self.get_term_details(term_name)
         if not result:
             print("Term not found")
             return
 
-        name, definition, category = result
+        name, definition, category, answers = result
 
         print("\n" + "="*50)
         print(f"TERM: {name}")
         print("="*50)
         print(f"Category: {category}")
+        term_id = self.get_term_id(name)
+        if term_id is not None:
+            breadcrumb = self.get_breadcrumb(term_id)
+            if breadcrumb:
+                print(f"Path: {' > '.join(breadcrumb + [name])}")
+            subterms = self.get_subtree_size(term_id) - 1
+            if subterms:
+                print(f"Subterms: {subterms}")
         print(f"\nDefinition:\n{definition}")
 
-        # Get all 7 answers
-        self.cursor.execute("""
-            SELECT q.question_text, a.answer_text
-            FROM answers a
-            JOIN questions q ON a.question_id = q.id
-            WHERE a.term_id = (SELECT id FROM terms WHERE name = ?)
-            ORDER BY q.order_num
-        """, (term_name,))
-
-        answers = self.cursor.fetchall()
+        # Show all 7 answers
         if answers:
             print("\n" + "-"*50)
             for question, answer in answers:
@@ -143,14 +414,7 @@ class HCIStudyTool:
         input("\nPress Enter to continue...")
 
     def random_flashcard(self):
-        self.cursor.execute("""
-            SELECT name, definition
-            FROM terms
-            ORDER BY RANDOM()
-            LIMIT 1
-        """)
-
-        name, definition = self.cursor.fetchone()
+        _, name, definition = self.get_random_terms(1)[0]
 
         print("\n" + "="*50)
         print("RANDOM FLASHCARD")
@@ -164,14 +428,7 @@ class HCIStudyTool:
             self.show_term_details(name)
 
     def quiz_mode(self):
-        self.cursor.execute("""
-            SELECT id, name, definition
-            FROM terms
-            ORDER BY RANDOM()
-            LIMIT 10
-        """)
-
-        questions = self.cursor.fetchall()
+        questions = self.get_random_terms(10, stratified=True)
         score = 0
 
         print("\n" + "="*50)
@@ -193,15 +450,7 @@ class HCIStudyTool:
             print(f"\nDefinition:\n{definition}")
 
             # Show key answers
-            self.cursor.execute("""
-                SELECT q.question_text, a.answer_text
-                FROM answers a
-                JOIN questions q ON a.question_id = q.id
-                WHERE a.term_id = ? AND q.order_num IN (2, 3)
-                ORDER BY q.order_num
-            """, (term_id,))
-
-            for question, answer in self.cursor.fetchall():
+            for question, answer in self.get_key_answers(term_id):
                 print(f"\n{question}")
                 print(f"{answer}")
 
@@ -220,16 +469,7 @@ class HCIStudyTool:
         print("NIELSEN'S 10 USABILITY HEURISTICS")
         print("="*50)
 
-        self.cursor.execute("""
-            SELECT t.name, t.definition
-            FROM terms t
-            WHERE t.parent_term_id = (
-                SELECT id FROM terms WHERE name = "Nielsen's Original Heuristics"
-            )
-            ORDER BY t.order_num
-        """)
-
-        heuristics = self.cursor.fetchall()
+        heuristics = self.get_nielsens_heuristics()
 
         for i, (name, definition) in enumerate(heuristics, 1):
             print(f"\n{i}. {name}")
@@ -242,15 +482,7 @@ class HCIStudyTool:
         print("ALL CATEGORIES")
         print("="*50)
 
-        self.cursor.execute("""
-            SELECT c.name, c.description, COUNT(t.id)
-            FROM categories c
-            LEFT JOIN terms t ON c.id = t.category_id
-            GROUP BY c.id
-            ORDER BY c.order_num
-        """)
-
-        for name, description, count in self.cursor.fetchall():
+        for name, description, count in self.get_category_summaries():
             print(f"\n{name} ({count} terms)")
             print(f"  {description}")
 
@@ -261,37 +493,33 @@ class HCIStudyTool:
         print("COMPARE TERMS")
         print("="*50)
 
-        # Show some common comparisons
-        print("\nCommon comparisons:")
-        print("1. UX vs UI vs HCI")
-        print("2. Usability vs Usefulness vs UX")
-        print("3. Formative vs Summative")
-        print("4. Analytic vs Empirical")
-        print("5. Custom search")
-
-        choice = input("\nSelect comparison (1-5): ").strip()
-
-        comparisons = {
-            '1': ['User Experience (UX)', 'User Interface (UI)', 'Human-Computer Interaction (HCI)'],
-            '2': ['Usability', 'Usefulness', 'User Experience (UX)'],
-            '3': ['Formative vs. Summative'],
-            '4': ['Analytic vs. Empirical']
-        }
-
-        if choice in comparisons:
-            terms = comparisons[choice]
-            for term in terms:
-                self.cursor.execute("""
-                    SELECT name FROM terms WHERE name LIKE ?
-                """, (f'%{term}%',))
-                result = self.cursor.fetchone()
-                if result:
-                    self.show_term_details(result[0])
-        elif choice == '5':
-            term1 = input("Enter first term: ").strip()
-            term2 = input("Enter second term: ").strip()
-            self.show_term_details(term1)
-            self.show_term_details(term2)
+        resolved = self.resolve_term(input("\nEnter a term to compare: ").strip())
+        if resolved is None:
+            print("Term not found")
+            return
+        term_id, term_name = resolved
+
+        related = self.get_related_terms(term_id)
+        if related:
+            print(f"\nTerms closest to {term_name}:")
+            for i, (_, name, relationship) in enumerate(related, 1):
+                print(f"{i}. {name} ({relationship.replace('_', ' ')})")
+        choice = input("\nCompare with (number, or another term's name): ").strip()
+
+        if choice.isdigit() and 1 <= int(choice) <= len(related):
+            other_id, other_name, _ = related[int(choice) - 1]
+        else:
+            resolved = self.resolve_term(choice)
+            if resolved is None:
+                print("Term not found")
+                return
+            other_id, other_name = resolved
+
+        connection = self.get_connection(term_id, other_id)
+        if connection:
+            print(f"\nConnection: {' -> '.join(connection)}")
+        self.show_term_details(term_name)
+        self.show_term_details(other_name)
 
     def run(self):
         while True:
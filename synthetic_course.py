@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Synthetic Course Generator
+Fills the create_database.sql schema with a realistic-looking course of any
+size: categories, multi-level term hierarchies, seven answers per term,
+examples and relationships. Used by benchmark.py to test scaling.
+"""
+
+import argparse
+import os
+import random
+
+from database import connect_writer, create_schema
+from populate_common import bulk_load
+from populate_database import insert_questions
+
+BATCH_SIZE = 5000
+
+# Roughly the shape of the real course: 7 categories for 149 terms
+TERMS_PER_CATEGORY = 25
+
+ADJECTIVES = [
+    "Adaptive", "Affective", "Analytic", "Cognitive", "Collaborative", "Contextual",
+    "Empirical", "Formative", "Heuristic", "Iterative", "Participatory", "Rapid",
+    "Rigorous", "Situated", "Summative", "Task-Based", "Usage-Centered", "Visual",
+]
+NOUNS = [
+    "Affordance", "Artifact Model", "Card Sort", "Cognitive Walkthrough", "Conceptual Model",
+    "Design Pattern", "Flow Model", "Heuristic", "Interaction Cycle", "Mental Model",
+    "Persona", "Prototype", "Requirement", "Scenario", "Storyboard", "Task Inventory",
+    "Usability Test", "User Journey", "Wireframe", "Work Role",
+]
+AREAS = [
+    "Research", "Design", "Evaluation", "Prototyping", "Analysis", "Interaction",
+    "Accessibility", "Information Architecture", "Visual Design", "Usability",
+]
+WORDS = """
+    users designers system interface task goal context feedback iteration prototype
+    evaluation requirement workflow model scenario experience usability learnability
+    efficiency error recovery consistency visibility mapping constraint affordance
+    mental conceptual stakeholder observation interview analysis synthesis insight
+    pattern artifact environment collaboration decision measurement benchmark target
+""".split()
+
+def sentence(rng, min_words, max_words):
+    """Return a capitalized pseudo-sentence built from HCI vocabulary"""
+    words = rng.choices(WORDS, k=rng.randint(min_words, max_words))
+    return ' '.join(words).capitalize() + '.'
+
+def paragraph(rng, sentences, min_words=8, max_words=16):
+    return ' '.join(sentence(rng, min_words, max_words) for _ in range(sentences))
+
+def insert_synthetic_categories(conn, num_categories, rng):
+    """Insert categories named after HCI areas"""
+    rows = []
+    for cat_id in range(1, num_categories + 1):
+        area = AREAS[(cat_id - 1) % len(AREAS)]
+        suffix = f" {(cat_id - 1) // len(AREAS) + 1}" if cat_id > len(AREAS) else ""
+        rows.append((cat_id, f"{area}{suffix}", sentence(rng, 5, 9), cat_id))
+    conn.executemany(
+        "INSERT INTO categories (id, name, description, order_num) VALUES (?, ?, ?, ?)", rows)
+
+def generate_terms(num_terms, num_categories, rng):
+    """Yield (id, category_id, parent_id, name, level, order_num) for every term.
+
+    Terms are grouped by category like the real course. About a third are
+    top-level; the rest hang under a recent term up to two levels deep.
+    """
+    per_category = -(-num_terms // num_categories)
+    parents = []
+    child_counts = {}
+    for term_id in range(1, num_terms + 1):
+        cat_id = (term_id - 1) // per_category + 1
+        if (term_id - 1) % per_category == 0:
+            parents = []
+            child_counts[None] = 0
+
+        parent_id, level = None, 0
+        if parents and rng.random() > 0.35:
+            parent_id, parent_level = rng.choice(parents[-20:])
+            level = parent_level + 1
+
+        child_counts[parent_id] = child_counts.get(parent_id, 0) + 1
+        name = f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {term_id}"
+        if level < 2:
+            parents.append((term_id, level))
+        yield term_id, cat_id, parent_id, name, level, child_counts[parent_id]
+
+def generate_course(db_path, num_terms, seed=0, num_categories=None):
+    """Create db_path (replacing any existing file) and fill it with num_terms terms"""
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    rng = random.Random(seed)
+    num_categories = num_categories or max(1, min(num_terms, -(-num_terms // TERMS_PER_CATEGORY), 200))
+
+    conn = connect_writer(db_path)
+    create_schema(conn)
+
+    with bulk_load(conn):
+        insert_questions(conn)
+        insert_synthetic_categories(conn, num_categories, rng)
+
+        terms, answers, examples, relationships = [], [], [], []
+
+        def flush():
+            conn.executemany("""
+                INSERT INTO terms (id, category_id, parent_term_id, name, definition, hierarchy_level, order_num)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, terms)
+            conn.executemany("INSERT INTO answers (term_id, question_id, answer_text) VALUES (?, ?, ?)", answers)
+            conn.executemany("INSERT INTO examples (term_id, example_text) VALUES (?, ?)", examples)
+            conn.executemany("""
+                INSERT INTO term_relationships (term_id, related_term_id, relationship_type)
+                VALUES (?, ?, ?)
+            """, relationships)
+            for rows in (terms, answers, examples, relationships):
+                rows.clear()
+
+        for term_id, cat_id, parent_id, name, level, order_num in generate_terms(num_terms, num_categories, rng):
+            terms.append((term_id, cat_id, parent_id, name, paragraph(rng, 2), level, order_num))
+            for question_num in range(1, 8):
+                answers.append((term_id, question_num, paragraph(rng, 2)))
+            for _ in range(rng.randint(0, 2)):
+                examples.append((term_id, sentence(rng, 6, 12)))
+            if term_id > 1:
+                related_id = rng.randint(max(1, term_id - 50), term_id - 1)
+                relationships.append((term_id, related_id, rng.choice(["related", "contrasts_with"])))
+
+            if len(terms) >= BATCH_SIZE:
+                flush()
+        flush()
+
+    conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic HCI course database")
+    parser.add_argument('num_terms', type=int, help="number of terms to generate")
+    parser.add_argument('--output', default='synthetic_course.db', help="database file to create")
+    parser.add_argument('--seed', type=int, default=0, help="random seed for reproducible content")
+    args = parser.parse_args()
+
+    generate_course(args.output, args.num_terms, seed=args.seed)
+    print(f"Generated {args.num_terms} terms in {args.output}")
+
+if __name__ == "__main__":
+    main()
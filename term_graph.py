@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Term Relationship Graph
+Loads term_relationships into an in-memory adjacency map once, then answers
+related-term queries without touching the database: k-hop neighbourhoods,
+the shortest chain of relationships between two terms and the nearest
+related terms ranked by relationship strength.
+
+The graph is undirected. The map is reloaded only when PRAGMA data_version
+shows another connection changed the database.
+"""
+
+import heapq
+from collections import deque
+
+# Cost of following one relationship when ranking related terms: explicit
+# comparisons are closest, then the hierarchy, then siblings
+RELATIONSHIP_COSTS = {
+    'compare_with': 1,
+    'contrasts_with': 1,
+    'related': 1,
+    'parent': 2,
+    'child': 2,
+    'sibling': 3,
+}
+DEFAULT_COST = 2
+
+# How a relationship reads from the related term's side
+REVERSE_RELATIONSHIPS = {'parent': 'child'}
+
+class TermGraph:
+    """Adjacency map of term id -> {related term id: relationship}"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.edges = {}
+        self.data_version = None
+
+    def refresh(self):
+        """Load every relationship, unless nothing has changed since the last load"""
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self.data_version:
+            return
+        self.edges = {}
+        for term_id, related_id, relationship in self.conn.execute(
+                "SELECT term_id, related_term_id, relationship_type FROM term_relationships"):
+            self._add(term_id, related_id, relationship)
+            self._add(related_id, term_id, REVERSE_RELATIONSHIPS.get(relationship, relationship))
+        self.data_version = data_version
+
+    def _add(self, term_id, related_id, relationship):
+        # Two terms related more than one way keep the closest relationship
+        neighbours = self.edges.setdefault(term_id, {})
+        current = neighbours.get(related_id)
+        if current is None or cost(relationship) < cost(current):
+            neighbours[related_id] = relationship
+
+    def neighbours(self, term_id, hops=1):
+        """Return {term id: hops away} for every term within hops relationships of term_id"""
+        self.refresh()
+        distances = {term_id: 0}
+        queue = deque([term_id])
+        while queue:
+            current = queue.popleft()
+            if distances[current] == hops:
+                continue
+            for related_id in self.edges.get(current, ()):
+                if related_id not in distances:
+                    distances[related_id] = distances[current] + 1
+                    queue.append(related_id)
+        del distances[term_id]
+        return distances
+
+    def shortest_path(self, source_id, target_id):
+        """Return the term ids on a fewest-hops chain from source_id to target_id, or None.
+
+        Searches breadth-first from both ends at once, always expanding the
+        smaller frontier, so only a small part of a large graph is visited.
+        """
+        self.refresh()
+        if source_id == target_id:
+            return [source_id]
+        parents = {source_id: None}
+        children = {target_id: None}
+        forward, backward = [source_id], [target_id]
+        while forward and backward:
+            if len(forward) > len(backward):
+                forward, backward = backward, forward
+                parents, children = children, parents
+            next_frontier = []
+            for current in forward:
+                for related_id in self.edges.get(current, ()):
+                    if related_id in parents:
+                        continue
+                    parents[related_id] = current
+                    if related_id in children:
+                        path = self._join(parents, children, related_id)
+                        return path if path[0] == source_id else path[::-1]
+                    next_frontier.append(related_id)
+            forward = next_frontier
+        return None
+
+    @staticmethod
+    def _join(parents, children, meeting_id):
+        path = []
+        node = meeting_id
+        while node is not None:
+            path.append(node)
+            node = parents[node]
+        path.reverse()
+        node = children[meeting_id]
+        while node is not None:
+            path.append(node)
+            node = children[node]
+        return path
+
+    def nearest_related(self, term_id, limit=5):
+        """Return up to limit [(term id, cost, first hop id, relationship), ...], closest first.
+
+        Cost is the sum of RELATIONSHIP_COSTS along the cheapest chain;
+        first hop is the term directly related to term_id the chain goes
+        through, and relationship is how that term relates to term_id. The
+        search stops as soon as limit terms are settled.
+        """
+        self.refresh()
+        start = self.edges.get(term_id, {})
+        heap = [(cost(relationship), related_id, related_id) for related_id, relationship in start.items()]
+        heapq.heapify(heap)
+        settled = {term_id}
+        results = []
+        while heap and len(results) < limit:
+            total, current, first_hop = heapq.heappop(heap)
+            if current in settled:
+                continue
+            settled.add(current)
+            results.append((current, total, first_hop, start[first_hop]))
+            for related_id, relationship in self.edges.get(current, {}).items():
+                if related_id not in settled:
+                    heapq.heappush(heap, (total + cost(relationship), related_id, first_hop))
+        return results
+
+def cost(relationship):
+    return RELATIONSHIP_COSTS.get(relationship, DEFAULT_COST)